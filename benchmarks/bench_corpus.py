@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+# Generate a synthetic corpus of manifests, indexes and image configs, and
+# benchmark scanning it with an increasing number of processes.
+# Run from the root of the repository:
+# PYTHONPATH=. python benchmarks/bench_corpus.py [count] [directory]
+# The corpus is generated in a temporary directory (removed after the run)
+# unless a directory is given, which keeps it for the next run.
+
+from opencontainers.image.v1.corpus import scan
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def digest(rng):
+    return "sha256:" + hashlib.sha256(rng.randbytes(8)).hexdigest()
+
+
+def descriptor(rng, mediaType, **kwargs):
+    content = {
+        "mediaType": mediaType,
+        "size": rng.randint(100, 50000000),
+        "digest": digest(rng),
+    }
+    content.update(kwargs)
+    return content
+
+
+def make_manifest(rng):
+    return {
+        "schemaVersion": 2,
+        "mediaType": "application/vnd.oci.image.manifest.v1+json",
+        "config": descriptor(rng, "application/vnd.oci.image.config.v1+json"),
+        "layers": [
+            descriptor(rng, "application/vnd.oci.image.layer.v1.tar+gzip")
+            for _ in range(rng.randint(1, 12))
+        ],
+        "annotations": {"org.opencontainers.image.version": "1.%s" % rng.randint(0, 9)},
+    }
+
+
+def make_index(rng):
+    return {
+        "schemaVersion": 2,
+        "mediaType": "application/vnd.oci.image.index.v1+json",
+        "manifests": [
+            descriptor(
+                rng,
+                "application/vnd.oci.image.manifest.v1+json",
+                platform={"architecture": arch, "os": "linux"},
+            )
+            for arch in rng.sample(["amd64", "arm64", "ppc64le", "s390x"], 3)
+        ],
+    }
+
+
+def make_config(rng):
+    layers = rng.randint(1, 12)
+    return {
+        "created": "2020-%02d-%02dT10:22:56.015925234Z"
+        % (rng.randint(1, 12), rng.randint(1, 28)),
+        "architecture": "amd64",
+        "os": "linux",
+        "config": {"Env": ["PATH=/usr/bin"], "Cmd": ["/bin/sh"]},
+        "rootfs": {"type": "layers", "diff_ids": [digest(rng) for _ in range(layers)]},
+        "history": [
+            {"created": "2020-01-01T00:00:00Z", "created_by": "/bin/sh -c #(nop)"}
+        ]
+        * layers,
+    }
+
+
+def break_document(rng, content):
+    """make a document invalid, in one of a few ways"""
+    if "rootfs" in content:
+        del content["os"]
+    elif "layers" in content:
+        content["layers"][0]["digest"] = "sha256:abc"
+    else:
+        content["manifests"][0]["size"] = "large"
+
+
+def generate_corpus(root, count, invalid=0.01, seed=0):
+    """write count documents (70% manifests, 20% configs and 10% indexes) in
+    subdirectories of root, with a fraction of invalid ones.
+    """
+    rng = random.Random(seed)
+    makers = [make_manifest] * 7 + [make_config] * 2 + [make_index]
+    for i in range(count):
+        content = rng.choice(makers)(rng)
+        if rng.random() < invalid:
+            break_document(rng, content)
+        directory = os.path.join(root, "%03d" % (i % 256))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "%08d.json" % i), "w") as fd:
+            json.dump(content, fd)
+
+
+def bench(root, count):
+    """generate a corpus in root (if it is empty), and time scanning it with
+    an increasing number of processes
+    """
+    if not os.listdir(root):
+        print("generating %s documents in %s" % (count, root))
+        generate_corpus(root, count)
+
+    workers = 1
+    baseline = None
+    while workers <= os.cpu_count():
+        start = time.perf_counter()
+        results = list(scan([root], workers=workers))
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        invalid = sum(1 for result in results if not result["valid"])
+        print(
+            "%2d workers %10.0f documents/s %6.2fx (%s invalid)"
+            % (workers, len(results) / seconds, baseline / seconds, invalid)
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    if len(sys.argv) > 2:
+        bench(sys.argv[2], count)
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            bench(root, count)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+# Benchmark digesting and verifying blobs on disk.
+# Run from the root of the repository:
+# PYTHONPATH=. python benchmarks/bench_digest.py [megabytes]
+
+from opencontainers.digest import (
+    CompactDigest,
+    Digest,
+    SHA256,
+    SHA512,
+    MultiDigester,
+    verify_many,
+    Parse,
+    EnableParseCache,
+    DisableParseCache,
+    RegisterAlgorithm,
+)
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+
+def throughput(name, func, size, repeat=3):
+    """print the megabytes per second of a function processing size bytes"""
+    seconds = min(_timed(func) for _ in range(repeat))
+    print("%-40s %10.0f MB/s" % (name, size / seconds / 1e6))
+
+
+def report(name, func, number):
+    """time a function and print microseconds per call"""
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print("%-40s %10.2f us" % (name, seconds / number * 1e6))
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def verify(digest, path, mapped):
+    verifier = digest.verifier()
+    verifier.writeFile(path, mapped=mapped)
+    assert verifier.verified()
+
+
+def write_chunks(digest, content, chunk=65536):
+    verifier = digest.verifier()
+    view = memoryview(content)
+    for start in range(0, len(content), chunk):
+        verifier.write(view[start : start + chunk])
+    assert verifier.verified()
+
+
+def read_bytes(path):
+    with open(path, "rb") as fd:
+        return SHA256.fromBytes(fd.read())
+
+
+def files(size):
+    """benchmark digesting and verifying one large file"""
+    with tempfile.NamedTemporaryFile() as blob:
+        blob.write(os.urandom(size))
+        blob.flush()
+        path = blob.name
+        digest = SHA256.fromFile(path)
+        with open(path, "rb") as fd:
+            content = fd.read()
+
+        print("\nfile of %s MB (in the page cache)" % (size // 1000000))
+        throughput("fromBytes(read())", lambda: read_bytes(path), size)
+        throughput("fromFile", lambda: SHA256.fromFile(path), size)
+        throughput(
+            "fromFile (mapped)", lambda: SHA256.fromFile(path, mapped=True), size
+        )
+        throughput(
+            "verifier.write (64KB chunks)", lambda: write_chunks(digest, content), size
+        )
+        throughput("verifier.writeFile", lambda: verify(digest, path, False), size)
+        throughput(
+            "verifier.writeFile (mapped)", lambda: verify(digest, path, True), size
+        )
+
+
+def multi(path, threads):
+    with MultiDigester([SHA256, SHA512], threads=threads) as digester:
+        digester.writeFile(path)
+        return digester.digests()
+
+
+def algorithms(size):
+    """benchmark digesting a file with sha256 and sha512"""
+    with tempfile.NamedTemporaryFile() as blob:
+        blob.write(os.urandom(size))
+        blob.flush()
+        path = blob.name
+
+        print("\nsha256 and sha512 of %s MB" % (size // 1000000))
+        throughput(
+            "fromFile twice",
+            lambda: (SHA256.fromFile(path), SHA512.fromFile(path)),
+            size,
+        )
+        throughput("MultiDigester", lambda: multi(path, False), size)
+        throughput("MultiDigester (threads)", lambda: multi(path, True), size)
+
+
+def many(size, count=64):
+    """benchmark verifying many blobs with an increasing number of threads"""
+    with tempfile.TemporaryDirectory() as root:
+        pairs = []
+        for i in range(count):
+            path = os.path.join(root, str(i))
+            with open(path, "wb") as fd:
+                fd.write(os.urandom(size // count))
+            pairs.append((path, SHA256.fromFile(path)))
+
+        print("\nverify_many, %s blobs of %s MB" % (count, size // count // 1000000))
+        workers = 1
+        while workers <= (os.cpu_count() or 1) * 2:
+            throughput(
+                "verify_many (%s threads)" % workers,
+                lambda: all(not error for _, _, error in verify_many(pairs, workers)),
+                size,
+            )
+            workers *= 2
+
+
+def parse():
+    """benchmark parsing a digest, with and without the parse cache"""
+    digest = str(SHA256.fromBytes(b"content"))
+    print("\nparse")
+    report("Parse", lambda: Parse(digest), 20000)
+    report("Digest.validate", Parse(digest).validate, 20000)
+    EnableParseCache()
+    report("Parse (cached)", lambda: Parse(digest), 20000)
+    report("Digest.validate (cached)", Parse(digest).validate, 20000)
+    DisableParseCache()
+
+
+def memory(name, func, number):
+    """print the memory allocated per object created by func"""
+    tracemalloc.start()
+    objects = [func(i) for i in range(number)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("%-40s %10.2f bytes" % (name, size / len(objects)))
+
+
+def compact(number=100000):
+    """benchmark the memory and conversions of Digest and CompactDigest"""
+    digests = [str(SHA256.fromBytes(b"%d" % i)) for i in range(number)]
+    print("\ncompact digests")
+    memory("Digest", lambda i: Digest(digests[i]), number)
+    memory("CompactDigest", lambda i: CompactDigest.fromDigest(digests[i]), number)
+    digest = Digest(digests[0])
+    compact = digest.compact()
+    report("Digest.compact", digest.compact, 20000)
+    report("CompactDigest.toDigest", compact.toDigest, 20000)
+    report("hash(Digest)", lambda: hash(digest), 20000)
+    report("hash(CompactDigest)", lambda: hash(compact), 20000)
+
+
+def registered(size):
+    """benchmark the throughput of the algorithms, with blake2 registered"""
+    algs = [
+        SHA256,
+        SHA512,
+        RegisterAlgorithm("blake2b", hashlib.blake2b),
+        RegisterAlgorithm("blake2s", hashlib.blake2s),
+    ]
+    content = os.urandom(size)
+    key = os.urandom(1024)
+    print("\nalgorithms")
+    for alg in algs:
+        throughput(
+            "%s.fromBytes (%s MB)" % (alg, size // 1000000),
+            lambda: alg.fromBytes(content),
+            size,
+        )
+    for alg in algs:
+        report("%s.fromBytes (1 KB)" % alg, lambda: alg.fromBytes(key), 20000)
+
+
+if __name__ == "__main__":
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    parse()
+    compact()
+    files(megabytes * 1000000)
+    algorithms(megabytes * 1000000)
+    many(megabytes * 1000000)
+    registered(megabytes * 1000000)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+# Benchmark construction, memory, load and dump of Struct objects.
+# Run from the root of the repository: PYTHONPATH=. python benchmarks/bench_struct.py
+
+from opencontainers.image.v1 import Descriptor, Index, Manifest
+from opencontainers.struct import Struct
+import copy
+import json
+import pickle
+import timeit
+import tracemalloc
+
+descriptor = {
+    "mediaType": "application/vnd.oci.image.manifest.v1+json",
+    "size": 7682,
+    "digest": "sha256:5b0bcabd1ed22e9fb1310cf6c2dec7cdef19f0ad69efa1f392e94a4333501270",
+    "platform": {"architecture": "amd64", "os": "linux"},
+}
+
+# A descriptor with urls to check against a regular expression
+descriptor_urls = dict(descriptor)
+descriptor_urls["urls"] = ["https://example.com/blobs/%s" % i for i in range(8)]
+
+index = {"schemaVersion": 2, "manifests": [descriptor] * 5000}
+
+manifest = {
+    "schemaVersion": 2,
+    "config": {
+        "mediaType": "application/vnd.oci.image.config.v1+json",
+        "size": 1470,
+        "digest": "sha256:c86f7763873b6c0aae22d963bab59b4f5debbed6685761b5951584f6efb0633b",
+    },
+    "layers": [
+        {
+            "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+            "size": 675598,
+            "digest": "sha256:9d3dd9504c685a304985025df4ed0283e47ac9ffa9bd0326fddf4d59513f0827",
+        }
+    ]
+    * 10,
+    "annotations": {"key1": "value1", "key2": "value2"},
+}
+
+
+def report(name, func, number):
+    """time a function and print microseconds per call"""
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print("%-30s %10.2f us" % (name, seconds / number * 1e6))
+
+
+def memory(name, func, number):
+    """print the memory allocated per object created by func"""
+    tracemalloc.start()
+    objects = [func() for _ in range(number)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("%-30s %10.2f bytes" % (name, size / len(objects)))
+
+
+def uncached(struct, func):
+    """return a function that clears the cache of a struct tree, then calls func"""
+    structs = [struct]
+    for value in struct._values:
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, Struct) and not isinstance(child, (str, int)):
+                structs.append(child)
+
+    def run():
+        for struct in structs:
+            struct.__dict__.pop("_cache", None)
+        return func()
+
+    return run
+
+
+def load_dump(label, encoded):
+    """benchmark loading and dumping a Descriptor, Manifest and Index"""
+    print("\n%s" % label)
+    report("Descriptor.from_dict", lambda: Descriptor.from_dict(descriptor), 5000)
+    report(
+        "Descriptor.from_dict (urls)",
+        lambda: Descriptor.from_dict(descriptor_urls),
+        5000,
+    )
+    report(
+        "Descriptor.from_dict (trusted)",
+        lambda: Descriptor.from_dict(descriptor, trust=True),
+        5000,
+    )
+    loaded = Descriptor.from_dict(descriptor)
+    report("Descriptor.validate", loaded.validate, 5000)
+    report("Descriptor.to_dict", uncached(loaded, loaded.to_dict), 5000)
+    report("Manifest.from_dict", lambda: Manifest.from_dict(manifest), 2000)
+    memory(
+        "Manifest.from_dict memory",
+        lambda: Manifest.from_dict(json.loads(encoded)),
+        1000,
+    )
+    report(
+        "Manifest.from_dict (trusted)",
+        lambda: Manifest.from_dict(manifest, trust=True),
+        2000,
+    )
+    loaded = Manifest.from_dict(manifest)
+    pickled = pickle.dumps(loaded, protocol=5)
+    report(
+        "Manifest json + from_dict",
+        lambda: Manifest.from_dict(json.loads(encoded)),
+        2000,
+    )
+    report("Manifest pickle.loads", lambda: pickle.loads(pickled), 2000)
+    report("Manifest pickle.dumps", lambda: pickle.dumps(loaded, protocol=5), 2000)
+    print("%-30s %10d bytes" % ("Manifest json size", len(encoded)))
+    print("%-30s %10d bytes" % ("Manifest pickle size", len(pickled)))
+    report(
+        "Manifest.with_changes",
+        lambda: loaded.with_changes(Annotations={"key": "value"}),
+        2000,
+    )
+    report("Manifest deepcopy", lambda: copy.deepcopy(loaded), 200)
+    report("Manifest.to_dict", uncached(loaded, loaded.to_dict), 2000)
+    report("Manifest.to_dict (cached)", loaded.to_dict, 2000)
+    report("Manifest.to_json", uncached(loaded, loaded.to_json), 2000)
+    report("Manifest.to_json (cached)", loaded.to_json, 2000)
+    report(
+        "Manifest.to_canonical_bytes", uncached(loaded, loaded.to_canonical_bytes), 2000
+    )
+    report("Manifest.descriptor", uncached(loaded, loaded.descriptor), 2000)
+    report("Index.from_dict (5000)", lambda: Index.from_dict(index), 3)
+    report(
+        "Index.from_dict (5000, trusted)",
+        lambda: Index.from_dict(index, trust=True),
+        3,
+    )
+    report(
+        "Index.from_dict (5000, lazy)",
+        lambda: Index.from_dict(index, lazy=True).get("Manifests")[0],
+        3,
+    )
+
+
+if __name__ == "__main__":
+    report("Descriptor()", Descriptor, 10000)
+    memory("Descriptor() memory", Descriptor, 10000)
+
+    # Decoding the json into plain dicts is the lower bound
+    print("\nplain dict")
+    encoded = json.dumps(manifest)
+    report("json.loads(Manifest)", lambda: json.loads(encoded), 2000)
+
+    load_dump("generic", encoded)
+    for struct in [Descriptor, Manifest, Index]:
+        struct.compile()
+    load_dump("compiled", encoded)
@@ -0,0 +1,322 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.struct import Struct, StrStruct, IntStruct, LazyList, reuse_struct
+from opencontainers.timestamp import to_timestamp
+from opencontainers.logger import bot
+from datetime import datetime
+
+
+def compile_struct(cls):
+    """generate straight-line load and _to_dict functions from the schema of a
+    Struct class, and install them on the class. Nested Struct types are
+    compiled too. The generated functions behave like Struct.load and
+    Struct._to_dict, and are only generated once per class.
+    """
+    if "_compiled" in cls.__dict__:
+        return cls
+
+    # Set first so recursive (nested) schemas don't compile twice
+    cls._compiled = True
+
+    namespace = {
+        "cls": cls,
+        "Struct": Struct,
+        "bot": bot,
+        "load_str": _load_str,
+        "load_int": _load_int,
+        "reuse": reuse_struct,
+        "unknown": _unknown,
+        "LazyList": LazyList,
+        "to_timestamp": to_timestamp,
+        "known": frozenset(cls._json_lookup),
+    }
+
+    lines = _generate_load(cls, namespace) + _generate_load_trusted(cls, namespace)
+    lines += _generate_to_dict(cls, namespace)
+    lines += [
+        "def from_dict(struct, content, validate=True, trust=False, lazy=False):",
+        "    if struct is not cls:",
+        "        return struct().load(content, validate, trust, lazy)",
+        "    return load(cls.__new__(cls), content, validate, trust, lazy)",
+    ]
+    source = "\n".join(lines) + "\n"
+    code = compile(source, "<opencontainers.codegen %s>" % cls.__name__, "exec")
+    exec(code, namespace)
+
+    # Don't replace functions that a subclass has customized. Subclasses of
+    # the class inherit them, and fall back to Struct.load
+    if cls.load is Struct.load:
+        cls.load = namespace["load"]
+        cls.from_dict = classmethod(namespace["from_dict"])
+    if cls._to_dict is Struct._to_dict:
+        cls._to_dict = namespace["to_dict"]
+    cls._source = source
+    return cls
+
+
+def _load_str(attType, value):
+    """load a StrStruct, mirroring StrStruct.load without an empty instance"""
+    if isinstance(value, str):
+        value = attType(value)
+        value.validate()
+        return value
+
+
+def _load_int(attType, value):
+    """load an IntStruct, mirroring IntStruct.load without an empty instance"""
+    if isinstance(value, int):
+        value = attType(value)
+        value.validate()
+        return value
+
+
+def _unknown(content, known):
+    """exit with the first key of content that isn't a valid json attribute"""
+    key = next(key for key in content if key not in known)
+    bot.exit("%s is not a valid json attribute." % key)
+
+
+def _child_loader(att, attType, name, trust=False):
+    """return an expression template to load a nested value v of attType. A
+    trusted value is loaded without validation.
+    """
+    if not att._is_struct(attType):
+        return None
+    for base, loader in ((StrStruct, "load_str"), (IntStruct, "load_int")):
+        if issubclass(attType, base) and attType.load is base.load:
+            if trust:
+                return "%s({v})" % name
+            return "%s(%s, {v})" % (loader, name)
+    if issubclass(attType, (StrStruct, IntStruct)):
+        return "%s().load({v}%s)" % (name, ", trust=True" if trust else "")
+    compile_struct(attType)
+
+    # A struct that is already loaded is kept, if it is valid
+    if trust:
+        template = (
+            "({v} if isinstance({v}, %s) else %s.from_dict({v}, trust=True, lazy=lazy))"
+        )
+        return template % (name, name)
+    return "(reuse({v}) if isinstance({v}, %s) else %s.from_dict({v}))" % (name, name)
+
+
+def _generate_load(cls, namespace):
+    """generate the lines of a load(self, content, validate) function"""
+    lines = [
+        "def load(self, content, validate=True, trust=False, lazy=False):",
+        "    state = self.__dict__",
+        "    if self.__class__ is not cls or '_fields' in state or '_frozen' in state:",
+        "        return Struct.load(self, content, validate, trust, lazy)",
+        "    if not isinstance(content, dict):",
+        "        bot.exit('Please provide a dictionary or list to load.')",
+        "    if not known.issuperset(content):",
+        "        unknown(content, known)",
+        "    if trust or lazy:",
+        "        return load_trusted(self, content, lazy)",
+        "    values = [None] * %d" % len(cls._fields),
+    ]
+
+    for att in cls._fields.values():
+        i = att.index
+        namespace["att_%s" % i] = att
+        namespace["type_%s" % i] = att.attType
+        namespace["intern_%s" % i] = att.interner
+        lines += [
+            "    if %r in content:" % att.jsonName,
+            "        value = content[%r]" % att.jsonName,
+        ]
+
+        # Nested structures, or lists of them
+        if isinstance(att.attType, list):
+            child = att.attType[0] if att.attType else None
+            namespace["child_%s" % i] = child
+            loader = _child_loader(att, child, "child_%s" % i) if child else None
+            if loader:
+                lines += [
+                    "        if isinstance(value, list):",
+                    "            value = [%s for v in value]" % loader.format(v="v"),
+                    "        else:",
+                    "            value = %s" % loader.format(v="value"),
+                ]
+        else:
+            loader = _child_loader(att, att.attType, "type_%s" % i)
+            if loader:
+                lines.append("        value = %s" % loader.format(v="value"))
+            if att.attType == datetime:
+                lines.append("        value = to_timestamp(value)")
+
+        valid = _type_check(att)
+
+        if att.regexp:
+            valid = "att_%s.validate_regexp(value) and %s" % (i, valid)
+
+        lines += [
+            "        if %s:" % valid,
+            "            values[%s] = %s" % (i, _interned(att, "value")),
+            "        elif validate:",
+            "            bot.exit(%r)"
+            % ("%s (%s) is not valid." % (att.name, att.jsonName)),
+        ]
+
+    lines += ["    self._values = values", "    self.invalidate()", "    if validate:"]
+    for line in _generate_required(cls):
+        lines.append(
+            "    " + line.replace("return None", "bot.exit('%s is invalid' % self)")
+        )
+    lines += ["    return self", ""]
+    return lines
+
+
+def _generate_load_trusted(cls, namespace):
+    """generate the lines of a load_trusted(self, content, lazy) function,
+    which stores values (and nested structs) without any validation.
+    """
+    lines = [
+        "def load_trusted(self, content, lazy):",
+        "    values = [None] * %d" % len(cls._fields),
+    ]
+
+    for att in cls._fields.values():
+        i = att.index
+        value = "value"
+        lazy = None
+        if isinstance(att.attType, list):
+            child = att.attType[0] if att.attType else None
+            loader = _child_loader(att, child, "child_%s" % i, True) if child else None
+            if loader:
+                value = "[%s for v in value] if isinstance(value, list) else %s" % (
+                    loader.format(v="v"),
+                    loader.format(v="value"),
+                )
+                if not issubclass(child, (StrStruct, IntStruct)):
+                    lazy = "LazyList(child_%s, value)" % i
+        else:
+            loader = _child_loader(att, att.attType, "type_%s" % i, True)
+            if loader:
+                value = loader.format(v="value")
+            elif att.attType == datetime:
+                value = "to_timestamp(value)"
+        lines += [
+            "    if %r in content:" % att.jsonName,
+            "        value = content[%r]" % att.jsonName,
+        ]
+        if lazy:
+            lines += [
+                "        if lazy and isinstance(value, list):",
+                "            values[%s] = %s" % (i, lazy),
+                "        else:",
+                "            values[%s] = %s" % (i, value),
+            ]
+        else:
+            lines.append("        values[%s] = %s" % (i, _interned(att, value)))
+
+    lines += [
+        "    self._values = values",
+        "    self.invalidate()",
+        "    return self",
+        "",
+    ]
+    return lines
+
+
+def _interned(att, value):
+    """return the expression to intern a value, if the attribute does"""
+    if att.interner:
+        return "intern_%s(%s)" % (att.index, value)
+    return value
+
+
+def _type_check(att):
+    """return the expression that checks the type of a value, as the
+    type_validator of the attribute does
+    """
+    i = att.index
+    if isinstance(att.attType, list):
+        if att.attType:
+            return (
+                "isinstance(value, list) and all(isinstance(v, child_%s) for v in value)"
+                % i
+            )
+        return "isinstance(value, list)"
+    if att.attType == datetime:
+        return "att_%s.validate_datetime(value)" % i
+    return "isinstance(value, type_%s)" % i
+
+
+def _generate_required(cls, types=False):
+    """generate the checks of Struct.validate that loading doesn't already do,
+    namely required attributes and custom validation. Load checks the type of
+    a value before it is stored, but a trusted load doesn't, so the types are
+    checked too if types is True (e.g., before serializing).
+    """
+    lines = ["    values = self._values"]
+    for att in cls._fields.values():
+        if att.required:
+            lines += [
+                "    if not values[%s]:" % att.index,
+                "        bot.error(%r)" % ("%s is required." % att.name),
+                "        return None",
+            ]
+        if types:
+            lines += [
+                "    value = values[%s]" % att.index,
+                "    if value and not (%s):" % _type_check(att),
+                "        bot.error(%r)"
+                % ("%s should be type %s" % (att.name, att.attType)),
+                "        return None",
+            ]
+    if hasattr(cls, "_validate"):
+        lines += ["    if not self._validate():", "        return None"]
+    return lines
+
+
+def _generate_to_dict(cls, namespace):
+    """generate the lines of a to_dict(self) function"""
+    lines = [
+        "def to_dict(self):",
+        "    if self.__class__ is not cls or '_fields' in self.__dict__:",
+        "        return Struct._to_dict(self)",
+    ]
+    lines += _generate_required(cls, types=True)
+    lines.append("    result = {}")
+
+    # The "empty" values based on types (mirrors Go)
+    empty = {str: '""', int: "None", list: "[]", dict: "{}"}
+
+    for att in cls._fields.values():
+        if att.hide:
+            continue
+        i = att.index
+        lines += ["    value = values[%s]" % i, "    if value:"]
+
+        if isinstance(att.attType, list):
+            child = att.attType[0] if att.attType else None
+            if child and att._is_struct(child) and issubclass(child, Struct):
+                if issubclass(child, (StrStruct, IntStruct)):
+                    encoded = "list(value)"
+                else:
+                    encoded = "[v.to_dict() for v in value]"
+            elif child:
+                encoded = "list(value)"
+            else:
+                encoded = "att_%s.to_dict(value)" % i
+        elif att._is_struct() and not issubclass(att.attType, (StrStruct, IntStruct)):
+            encoded = "value.to_dict()"
+        elif att.attType is list:
+            encoded = "att_%s.to_dict(value)" % i
+        else:
+            encoded = "value"
+
+        lines.append("        result[%r] = %s" % (att.jsonName, encoded))
+        if not att.omitempty:
+            default = (
+                empty.get(att.attType, "[]") if isinstance(att.attType, type) else "[]"
+            )
+            lines += ["    else:", "        result[%r] = %s" % (att.jsonName, default)]
+
+    lines += ["    return result", ""]
+    return lines
@@ -13,8 +13,25 @@ from .digest import (
     FromString,
     FromBytes,
     Parse,
+    EnableParseCache,
+    DisableParseCache,
 )
 
-from .algorithm import Algorithm, SHA256, SHA384, SHA512, Canonical
+from .algorithm import (
+    Algorithm,
+    SHA256,
+    SHA384,
+    SHA512,
+    Canonical,
+    RegisterAlgorithm,
+)
+
+from .digester import MultiDigester
+
+from .compact import CompactDigest
+
+from .digestset import DigestSet, NewSet, ShortCodeTable
 
 from .verifiers import hashVerifier
+
+from .bulk import verify_many, digest_many
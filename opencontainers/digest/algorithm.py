@@ -6,6 +6,11 @@
 
 from opencontainers.struct import StrStruct
 from opencontainers.logger import bot
+from opencontainers.regexp import (
+    compile_regexp,
+    FullDigestRegexp,
+    AlgorithmNameRegexp,
+)
 from .digester import digester
 from .exceptions import (
     ErrDigestInvalidFormat,
@@ -13,9 +18,16 @@ from .exceptions import (
     ErrDigestInvalidLength,
 )
 
+import base64
 import hashlib
-import re
-import io
+import mmap
+import os
+
+# BufferSize is the number of bytes read at once to digest a file or reader
+BufferSize = 1024 * 1024
+
+# MapSize is the number of bytes of a memory mapped file hashed at once
+MapSize = 16 * 1024 * 1024
 
 
 class Algorithm(StrStruct):
@@ -34,9 +46,12 @@ class Algorithm(StrStruct):
         we are flexible to allow the user to also provide a full digest
         """
         algorithm = self.value
+        if algorithm in algorithms:
+            self._algorithm = algorithm
+            return True
 
         # If we have a full digest, name is separated by :
-        match = re.search("^(?P<algorithm>.+?):(?P<digest>.+)", self.value)
+        match = FullDigestRegexp.search(self.value)
         if match:
             algorithm = match.group("algorithm")
 
@@ -57,7 +72,10 @@ class Algorithm(StrStruct):
         """Hash returns a new hash as used by the algorithm."""
         if not self.available():
             return None
-        return hashlib.new(self._algorithm)
+        factory = factories.get(self._algorithm)
+        if factory is None:
+            return hashlib.new(self._algorithm)
+        return factory()
 
     def validate(self, encoded):
         """Validate validates the encoded portion string. This means
@@ -67,10 +85,9 @@ class Algorithm(StrStruct):
         if not self.available():
             raise ErrDigestUnsupported()
 
-        # Digests much always be hex-encoded, ensuring that their hex portion will
-        # always be size*2
-        hashy = hashlib.new(self._algorithm)
-        if hashy.digest_size * 2 != len(encoded):
+        # The encoded portion has the length of the encoding of the hash, for
+        # hex-encoded digests size*2
+        if encodedSize(self._algorithm) != len(encoded):
             raise ErrDigestInvalidLength()
 
         regexp = anchoredEncodedRegexps.get(self._algorithm)
@@ -82,10 +99,7 @@ class Algorithm(StrStruct):
         """Size returns number of bytes returned by the hash."""
         if not self.available():
             return 0
-        hashy = hashlib.new(self._algorithm)
-
-        # Need to ensure that the digest size == bytes and we don't want block_size
-        return hashy.digest_size
+        return digestSize(self._algorithm)
 
     def set(self, value):
         """Set implemented to allow use of Algorithm as a command line flag.
@@ -100,22 +114,41 @@ class Algorithm(StrStruct):
         """Encode encodes the raw bytes of a digest, typically from a hash.Hash, into
         the encoded portion of the digest.
         """
-        # Currently, all algorithms use a hex encoding. When we
-        # add support for back registration, we can modify this accordingly.
+        # The encoding is hex, unless the algorithm was registered with another
         # https://github.com/opencontainers/go-digest/blob/master/algorithm.go#L137
         if not isinstance(content, bytes):
             content = bytes(content, "utf-8")
-        return content.hex()
+        encoding = algorithmEncodings.get(self._algorithm)
+        if encoding is None:
+            return content.hex()
+        return encoding.encode(content)
 
-    def fromReader(self, ioReader):
+    def fromReader(self, ioReader, bufferSize=BufferSize):
         """FromReader returns the digest of the reader using the algorithm.
-        the input must be type bytes, usually from io.BytesIO.read().
-        This function likely isn't needed, but is provided to mirror
-        the GoLang implementation.
+        The reader can be any binary file object (e.g., an open file, a
+        socket file, or io.BytesIO). It is read in chunks, so the memory used
+        doesn't depend on the size of the content.
+
+        Parameters
+        ==========
+        ioReader: a binary file object to digest until its end
+        bufferSize: the number of bytes to read at once
+        """
+        if not hasattr(ioReader, "read"):
+            bot.exit("input must be a binary file object")
+        digester = self.digester()
+        digester.hash = readHash(ioReader, digester.hash, bufferSize)
+        return digester.digest()
+
+    def fromFile(self, path, bufferSize=BufferSize, mapped=False):
+        """FromFile returns the digest of the content of a file (e.g., a layer
+        blob) using the algorithm, reading it in chunks of bufferSize. If
+        mapped is True, the file is memory mapped and hashed without copying
+        (see mapHash).
         """
-        if not isinstance(ioReader, io.BytesIO):
-            bot.exit("input must be io.BytesIO")
-        return self.fromBytes(ioReader.read())
+        digester = self.digester()
+        digester.hash = fileHash(path, digester.hash, bufferSize, mapped)
+        return digester.digest()
 
     def fromBytes(self, content):
         """FromBytes digests the input and returns a Digest."""
@@ -133,6 +166,139 @@ class Algorithm(StrStruct):
         return self.fromBytes(content)
 
 
+def digestSize(name):
+    """return the number of bytes of the hash of an algorithm (by name),
+    looked up in digestSizes instead of creating a hash object each time.
+    """
+    size = digestSizes.get(name)
+    if size is None:
+        # Need to ensure that the digest size == bytes and we don't want block_size
+        factory = factories.get(name) or (lambda: hashlib.new(name))
+        size = digestSizes[name] = factory().digest_size
+    return size
+
+
+def encodedSize(name):
+    """return the length of the encoded portion of digests of an algorithm"""
+    size = encodedSizes.get(name)
+    if size is None:
+        encoding = algorithmEncodings.get(name, Hex)
+        size = encodedSizes[name] = len(encoding.encode(bytes(digestSize(name))))
+    return size
+
+
+def readHash(ioReader, hashObj, bufferSize=BufferSize):
+    """update a hash object with the content of a binary file object, and
+    return the hash object. The content is read from the current position to
+    the end, which the file object is left at. An in-memory file (e.g.,
+    BytesIO) is hashed from its buffer, and hashlib.file_digest is used for
+    other binary files if it is available (python 3.11 and later). Otherwise
+    the content is read into one reusable buffer, so no bytes are allocated
+    per chunk.
+    """
+    if hasattr(ioReader, "getbuffer"):
+        position = ioReader.tell()
+        with ioReader.getbuffer() as buffer:
+            hashObj.update(buffer[position:])
+            ioReader.seek(len(buffer))
+        return hashObj
+
+    if hasattr(hashlib, "file_digest") and _isBinaryFile(ioReader):
+        return hashlib.file_digest(ioReader, lambda: hashObj)
+
+    update = hashObj.update
+    readinto = getattr(ioReader, "readinto", None)
+    if readinto is None:
+        read = ioReader.read
+        for chunk in iter(lambda: read(bufferSize), read(0)):
+            if isinstance(chunk, str):
+                chunk = bytes(chunk, "utf-8")
+            update(chunk)
+        return hashObj
+
+    buffer = bytearray(bufferSize)
+    view = memoryview(buffer)
+    while True:
+        size = readinto(buffer)
+        if not size:
+            break
+        update(view[:size])
+    return hashObj
+
+
+def fileHash(path, hashObj, bufferSize=BufferSize, mapped=False):
+    """update a hash object with the content of a file, memory mapped or
+    read in chunks, and return the hash object.
+    """
+    if mapped:
+        return mapHash(path, hashObj)
+    with open(path, "rb", buffering=0) as fd:
+        return readHash(fd, hashObj, bufferSize)
+
+
+def mapHash(path, hashObj, bufferSize=MapSize):
+    """update a hash object with the content of a file that is memory mapped,
+    so slices of the mapping are hashed directly (without copying them to
+    bytes). This is faster for files on a local disk, but the file must not
+    be truncated while it is hashed. Files that can't be mapped (e.g., pipes)
+    are read instead.
+    """
+    with open(path, "rb", buffering=0) as fd:
+        size = os.fstat(fd.fileno()).st_size
+        try:
+            mapping = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and special files can't be mapped
+            return readHash(fd, hashObj)
+
+        with mapping:
+            if hasattr(mapping, "madvise"):
+                mapping.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapping) as view:
+                for start in range(0, size, bufferSize):
+                    hashObj.update(view[start : start + bufferSize])
+    return hashObj
+
+
+def _isBinaryFile(ioReader):
+    """determine if hashlib.file_digest can read a file object"""
+    try:
+        return hasattr(ioReader, "readinto") and ioReader.readable()
+    except (AttributeError, ValueError):
+        return False
+
+
+class Encoding:
+    """an Encoding converts the raw bytes of a hash to the encoded portion of
+    a digest, and back. The alphabet is a regular expression character class
+    of the encoded characters.
+    """
+
+    def __init__(self, name, encode, decode, alphabet):
+        self.name = name
+        self.encode = encode
+        self.decode = decode
+        self.alphabet = alphabet
+
+    def __repr__(self):
+        return "<opencontainers.digest.algorithm.Encoding:%s>" % self.name
+
+
+def _encodeBase64url(content):
+    return base64.urlsafe_b64encode(content).rstrip(b"=").decode("ascii")
+
+
+def _decodeBase64url(encoded):
+    return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+
+
+# encodings of the encoded portion of digests, by name
+
+Hex = Encoding("hex", bytes.hex, bytes.fromhex, "[a-f0-9]")
+Base64url = Encoding("base64url", _encodeBase64url, _decodeBase64url, "[a-zA-Z0-9_-]")
+
+encodings = {"hex": Hex, "base64url": Base64url}
+
 # supported digest types only to match GoLang
 
 SHA256 = Algorithm("sha256")  # sha256 with hex encoding (lower case only)
@@ -144,16 +310,75 @@ SHA512 = Algorithm("sha512")  # sha512 with hex encoding (lower case only)
 Canonical = SHA256
 
 # algorithms maps values to hash.Hash implementations. Other algorithms
-# may be available but they cannot be calculated by the digest package.
+# may be available but they cannot be calculated by the digest package,
+# unless they are added with RegisterAlgorithm.
 # this mirrors GoLang (there are more available in Python)
 
 algorithms = {"sha256": SHA256, "sha384": SHA384, "sha512": SHA512}
 
+# factories return a new hash object for each algorithm
+
+factories = {
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+}
+
+# digestSizes holds the number of bytes of the hash of each algorithm
+
+digestSizes = {"sha256": 32, "sha384": 48, "sha512": 64}
+
+# algorithmEncodings holds the encoding of each algorithm, and encodedSizes
+# the length of its encoded portion
+
+algorithmEncodings = {"sha256": Hex, "sha384": Hex, "sha512": Hex}
+
+encodedSizes = {"sha256": 64, "sha384": 96, "sha512": 128}
+
 # anchoredEncodedRegexps contains anchored regular expressions for hex-encoded
 # digests. Note that /A-F/ disallowed.
 
 anchoredEncodedRegexps = {
-    SHA256: re.compile("^[a-f0-9]{64}$"),
-    SHA384: re.compile("^[a-f0-9]{96}$"),
-    SHA512: re.compile("^[a-f0-9]{128}$"),
+    SHA256: compile_regexp("^[a-f0-9]{64}$"),
+    SHA384: compile_regexp("^[a-f0-9]{96}$"),
+    SHA512: compile_regexp("^[a-f0-9]{128}$"),
 }
+
+
+def RegisterAlgorithm(name, factory, encoding="hex"):
+    """RegisterAlgorithm adds an algorithm (or replaces the implementation of
+    one), so that digests using it can be validated, calculated and
+    verified. For example, to use blake2b for internal keys:
+
+    RegisterAlgorithm("blake2b", hashlib.blake2b)
+
+    Parameters
+    ==========
+    name: the name of the algorithm in digests (lower case letters and digits)
+    factory: a function that returns a new hash object (with update, digest
+             and digest_size), e.g., hashlib.blake2b
+    encoding: the name of the encoding of the hash in digests (hex or base64url)
+    """
+    if not AlgorithmNameRegexp.search(name):
+        bot.exit("%s is not a valid algorithm name." % name)
+    if encoding not in encodings:
+        bot.exit("%s is not a known encoding." % encoding)
+    encoding = encodings[encoding]
+
+    size = factory().digest_size
+    algorithm = Algorithm(name)
+    algorithms[name] = algorithm
+    factories[name] = factory
+    digestSizes[name] = size
+    algorithmEncodings[name] = encoding
+    encodedSizes[name] = len(encoding.encode(bytes(size)))
+    anchoredEncodedRegexps[algorithm] = compile_regexp(
+        "^%s{%d}$" % (encoding.alphabet, encodedSizes[name])
+    )
+
+    # Digests that were validated before might not be valid anymore
+    from .digest import parseCache
+
+    if parseCache is not None:
+        parseCache.cache_clear()
+    return algorithm
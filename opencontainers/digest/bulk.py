@@ -0,0 +1,145 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.logger import bot, ExitError
+from .algorithm import Algorithm, BufferSize, Canonical
+from .digest import Digest
+from .exceptions import (
+    ErrDigestInvalidFormat,
+    ErrDigestInvalidLength,
+    ErrDigestUnsupported,
+)
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import collections
+import os
+
+
+def verify_many(
+    pairs,
+    workers=None,
+    ordered=True,
+    progress=None,
+    cancel=None,
+    bufferSize=BufferSize,
+    mapped=False,
+):
+    """verify many files against their digests (e.g., the blobs of a
+    content store) with a pool of threads, since hashlib releases the GIL.
+    Yield (path, digest, error) for each file, where error is None if the
+    file is verified, or the reason it isn't (e.g., the file is missing).
+
+    Parameters
+    ==========
+    pairs: an iterable of (path, digest), a digest can be a string
+    workers: the number of threads (defaults to the number of cpus)
+    ordered: yield results in the order of pairs, or as they complete
+    progress: a function called with the number of files and bytes done
+    cancel: a threading.Event, set to stop (no more results are yielded)
+    bufferSize: the number of bytes read at once
+    mapped: memory map the files instead of reading them
+    """
+    jobs = ((_verify, path, digest, bufferSize, mapped) for path, digest in pairs)
+    return _run(jobs, workers, ordered, progress, cancel)
+
+
+def digest_many(
+    paths,
+    algorithm=Canonical,
+    workers=None,
+    ordered=True,
+    progress=None,
+    cancel=None,
+    bufferSize=BufferSize,
+    mapped=False,
+):
+    """digest many files with a pool of threads, yielding (path, digest,
+    error) for each, where digest is None if the file couldn't be read. See
+    verify_many for the parameters.
+    """
+    algorithm = Algorithm(algorithm)
+    jobs = ((_digest, path, algorithm, bufferSize, mapped) for path in paths)
+    return _run(jobs, workers, ordered, progress, cancel)
+
+
+def _verify(path, digest, bufferSize, mapped):
+    """verify one file, returning the result and the bytes read"""
+    with bot.collecting() as messages:
+        try:
+            digest = Digest(digest)
+            digest.validate()
+            size = os.stat(path).st_size
+            verifier = digest.verifier()
+            verifier.writeFile(path, bufferSize, mapped)
+        except ExitError:
+            return (path, digest, messages[-1]), 0
+        except (
+            ErrDigestInvalidFormat,
+            ErrDigestInvalidLength,
+            ErrDigestUnsupported,
+        ) as e:
+            return (path, digest, str(e)), 0
+        except OSError as e:
+            return (path, digest, str(e)), 0
+    if not verifier.verified():
+        return (path, verifier.digest, "digest mismatch"), size
+    return (path, verifier.digest, None), size
+
+
+def _digest(path, algorithm, bufferSize, mapped):
+    """digest one file, returning the result and the bytes read"""
+    with bot.collecting() as messages:
+        try:
+            size = os.stat(path).st_size
+            digest = algorithm.fromFile(path, bufferSize, mapped)
+        except ExitError:
+            return (path, None, messages[-1]), 0
+        except OSError as e:
+            return (path, None, str(e)), 0
+    return (path, digest, None), size
+
+
+def _run(jobs, workers, ordered, progress, cancel):
+    """run jobs (a function and its arguments) in a pool of threads, keeping
+    only a few of them queued per thread, and yield the results.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = collections.deque()
+    files = size = 0
+
+    executor = ThreadPoolExecutor(workers)
+    try:
+        for job in jobs:
+            if cancel is not None and cancel.is_set():
+                return
+            pending.append(executor.submit(*job))
+            while len(pending) >= workers * 2:
+                for result, done in _completed(pending, ordered):
+                    files, size = files + 1, size + done
+                    if progress:
+                        progress(files, size)
+                    yield result
+
+        while pending:
+            if cancel is not None and cancel.is_set():
+                return
+            for result, done in _completed(pending, ordered):
+                files, size = files + 1, size + done
+                if progress:
+                    progress(files, size)
+                yield result
+    finally:
+        # Jobs that haven't started are dropped if the results aren't needed
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _completed(pending, ordered):
+    """remove and return the results of the next (or any) completed jobs"""
+    if ordered:
+        return [pending.popleft().result()]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return [future.result() for future in done]
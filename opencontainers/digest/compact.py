@@ -0,0 +1,133 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.regexp import DigestRegexpAnchored, AlgorithmSeparatorRegexp
+from .algorithm import Algorithm, Hex, algorithms, algorithmEncodings, encodedSize
+from .digest import Digest
+from .exceptions import (
+    ErrDigestInvalidFormat,
+    ErrDigestUnsupported,
+    ErrDigestInvalidLength,
+)
+
+# compactAlgorithms holds the names of algorithms by their number in a
+# CompactDigest, and compactNumbers the reverse. A name can have an extra
+# component (e.g., sha256+ext), and compactBases holds the algorithm that
+# the size and encoding are those of (e.g., sha256)
+compactAlgorithms = []
+compactBases = []
+compactNumbers = {}
+
+
+def compactNumber(name):
+    """return the number of an algorithm (by name) in a CompactDigest"""
+    number = compactNumbers.get(name)
+    if number is None:
+        match = AlgorithmSeparatorRegexp.search(name)
+        base = name[: match.start()] if match else name
+        if base not in algorithms:
+            raise ErrDigestUnsupported()
+        number = compactNumbers[name] = len(compactAlgorithms)
+        compactAlgorithms.append(name)
+        compactBases.append(base)
+    return number
+
+
+for _name in algorithms:
+    compactNumber(_name)
+
+
+class CompactDigest:
+    """a CompactDigest holds a digest as the number of its algorithm and the
+    raw bytes of the hash (32 for sha256), instead of a string, so that many
+    digests (e.g., the index of a deduplicating store) use less memory. It
+    compares and hashes on the bytes, and converts to and from a Digest. An
+    algorithm with an extra component (e.g., sha256+ext) is kept, as
+    Digest.validate accepts it:
+
+    compact = CompactDigest.fromDigest(digest)
+    compact.toDigest() == digest
+    """
+
+    __slots__ = ("number", "raw")
+
+    def __init__(self, number, raw):
+        self.number = number
+        self.raw = raw
+
+    @classmethod
+    def fromDigest(cls, digest):
+        """create a CompactDigest from a Digest (or a digest string), raising
+        the same errors as Digest.validate if it isn't valid.
+        """
+        name, sep, encoded = str.partition(digest, ":")
+        if not sep or not encoded:
+            raise ErrDigestInvalidFormat()
+        number = compactNumbers.get(name)
+        if number is None:
+            if not DigestRegexpAnchored.search(digest):
+                raise ErrDigestInvalidFormat()
+            number = compactNumber(name)
+        base = compactBases[number]
+        if encodedSize(base) != len(encoded):
+            raise ErrDigestInvalidLength()
+        encoding = algorithmEncodings.get(base, Hex)
+        try:
+            raw = encoding.decode(encoded)
+        except ValueError:
+            raise ErrDigestInvalidFormat()
+
+        # The encoding must be canonical (e.g., upper case hex is not valid)
+        if encoding.encode(raw) != encoded:
+            raise ErrDigestInvalidFormat()
+        return cls(number, raw)
+
+    @classmethod
+    def fromHash(cls, algorithm, hashObj):
+        """create a CompactDigest from an algorithm and a hash object"""
+        return cls(compactNumber(str(algorithm)), hashObj.digest())
+
+    def toDigest(self):
+        """return the Digest (string) of the compact digest"""
+        return Digest(str(self))
+
+    @property
+    def algorithm(self):
+        """the algorithm, without any extra component (as for Digest)"""
+        return Algorithm(compactBases[self.number])
+
+    def encoded(self):
+        """Encoded returns the encoded portion of the digest."""
+        encoding = algorithmEncodings.get(compactBases[self.number], Hex)
+        return encoding.encode(self.raw)
+
+    def __str__(self):
+        return "%s:%s" % (compactAlgorithms[self.number], self.encoded())
+
+    def __repr__(self):
+        return "<opencontainers.digest.CompactDigest:%s>" % self
+
+    def __eq__(self, other):
+        if isinstance(other, CompactDigest):
+            return self.raw == other.raw and self.number == other.number
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, CompactDigest):
+            return (self.number, self.raw) < (other.number, other.raw)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.raw)
+
+    def __reduce__(self):
+        # Algorithms are pickled by name, since numbers depend on the order
+        # they were added in
+        return (_restore, (compactAlgorithms[self.number], self.raw))
+
+
+def _restore(name, raw):
+    return CompactDigest(compactNumber(name), raw)
@@ -6,9 +6,14 @@
 
 from opencontainers.struct import StrStruct
 from opencontainers.logger import bot
+from opencontainers.regexp import (
+    DigestRegexp,
+    DigestRegexpAnchored,
+    AlgorithmSeparatorRegexp,
+)
 from .algorithm import Algorithm
 from .exceptions import ErrDigestInvalidFormat
-import re
+import functools
 
 
 class Digest(StrStruct):
@@ -27,20 +32,27 @@ class Digest(StrStruct):
         super().__init__(value)
 
     def validate(self):
-        """Validate checks that the contents of self (the digest) is valid"""
+        """Validate checks that the contents of self (the digest) is valid.
+        If the parse cache is enabled (see EnableParseCache), a digest that
+        was already validated is only looked up.
+        """
+        if parseCache is not None:
+            parseCache(str.__str__(self))
+            return True
+        return self._validate()
+
+    def _validate(self):
         if not self:
             bot.exit("Empty digest")
 
-        regexp = "^[a-z0-9]+(?:[+._-][a-z0-9]+)*:[a-zA-Z0-9=_-]+$"
-
         # Must match for a digest
-        if not re.search(regexp, self):
+        if not DigestRegexpAnchored.search(self):
             raise ErrDigestInvalidFormat()
 
         algorithm, encoded = (self).split(":")
 
         # Remove the extra component, if there
-        match = re.search("[+._-]", algorithm)
+        match = AlgorithmSeparatorRegexp.search(algorithm)
         if match:
             algorithm = algorithm[: match.start()]
         algorithm = Algorithm(algorithm)
@@ -61,7 +73,7 @@ class Digest(StrStruct):
         if not algorithm or not encoded:
             bot.exit("empty digest or algorithm")
 
-        match = re.search("[+._-]", algorithm)
+        match = AlgorithmSeparatorRegexp.search(algorithm)
         if match:
             return match.start()
         return self.index(":", 1)
@@ -70,8 +82,7 @@ class Digest(StrStruct):
         """in the case of having an extra component, return the start of the
         encoded portion
         """
-        match = re.search(":", self, 1)
-        return match.start() + 1
+        return self.index(":") + 1
 
     @property
     def algorithm(self):
@@ -82,6 +93,14 @@ class Digest(StrStruct):
         """Encoded returns the encoded portion of the digest."""
         return self[self.startEncodedIndex() :]
 
+    def compact(self):
+        """return the digest as a CompactDigest, which holds the raw bytes of
+        the hash instead of a string (see opencontainers.digest.compact)
+        """
+        from .compact import CompactDigest
+
+        return CompactDigest.fromDigest(self)
+
     def verifier(self):
         """Verifier returns a writer object that can be used to verify a stream of
         content against the digest. If the digest is invalid, the method will panic.
@@ -94,13 +113,6 @@ class Digest(StrStruct):
         return hashVerifier(hashObj, digest=self)
 
 
-# DigestRegexp matches valid digest types.
-DigestRegexp = re.compile("[a-z0-9]+(?:[.+_-][a-z0-9]+)*:[a-zA-Z0-9=_-]+")
-
-# DigestRegexpAnchored matches valid digest types, anchored to the start and end of the match.
-DigestRegexpAnchored = re.compile("^%s$" % DigestRegexp)
-
-
 def NewDigestFromEncoded(algorithm, encoded):
     """NewDigestFromEncoded returns a Digest from alg and the encoded digest."""
     return Digest("%s:%s" % (algorithm, encoded))
@@ -136,6 +148,33 @@ def Parse(string):
     """Parse parses s and returns the validated digest object. An error will
     be returned if the format is invalid.
     """
+    if parseCache is not None:
+        return parseCache(string)
+    return _parse(string)
+
+
+def _parse(string):
     d = Digest(string)
-    d.validate()
+    d._validate()
     return d
+
+
+# parseCache returns validated digests by string, if enabled. Only valid
+# digests are cached, invalid ones are checked (and raise) every time.
+parseCache = None
+
+
+def EnableParseCache(maxsize=65536):
+    """EnableParseCache keeps the maxsize most recently used valid digests,
+    so parsing or validating a digest seen before is a dictionary lookup.
+    This is useful when the same digests are parsed many times (e.g., the
+    layers shared by many manifests).
+    """
+    global parseCache
+    parseCache = functools.lru_cache(maxsize=maxsize)(_parse)
+
+
+def DisableParseCache():
+    """DisableParseCache stops caching valid digests, and clears the cache"""
+    global parseCache
+    parseCache = None
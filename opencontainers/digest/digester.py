@@ -5,6 +5,7 @@
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from opencontainers.struct import Struct
+from opencontainers.logger import bot
 from hashlib import new
 
 
@@ -34,3 +35,117 @@ class digester(Struct):
         from .digest import NewDigest
 
         return NewDigest(self.alg, self.hash)
+
+    def __copy__(self):
+        return copyHasher(self)
+
+    def __deepcopy__(self, memo):
+        return copyHasher(self)
+
+
+class MultiDigester(Struct):
+    """MultiDigester calculates the digests of written data with several
+    algorithms at once (e.g., sha256 and sha512 when migrating a store), so
+    the data is only read once. If threads is True, each chunk is hashed by
+    the algorithms in parallel threads, since hashlib releases the GIL for
+    large buffers. Close it (or use it as a context manager) to stop them.
+
+    Parameters
+    ==========
+    algs: a list of algorithms (or their names), defaults to all available
+    threads: hash each chunk with the algorithms in parallel
+    """
+
+    def __init__(self, algs=None, threads=False):
+        from .algorithm import Algorithm, algorithms
+
+        super().__init__()
+        if algs is None:
+            algs = list(algorithms.values())
+        self.digesters = [Algorithm(alg).digester() for alg in algs]
+        for digester in self.digesters:
+            if digester.hash is None:
+                bot.exit("Algorithm %s is not available" % digester.alg)
+        self.executor = None
+        if threads and len(self.digesters) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self.executor = ThreadPoolExecutor(len(self.digesters) - 1)
+
+    def write(self, content):
+        """add bytes of content to the hash of each algorithm"""
+        if isinstance(content, str):
+            content = bytes(content, "utf-8")
+        if not self.executor:
+            for digester in self.digesters:
+                digester.hash.update(content)
+            return
+
+        # The first hash is updated in this thread while the others run
+        first, *others = self.digesters
+        futures = [
+            self.executor.submit(digester.hash.update, content) for digester in others
+        ]
+        first.hash.update(content)
+        for future in futures:
+            future.result()
+
+    # A MultiDigester can be updated like a hash object
+    update = write
+
+    def writeFile(self, path, bufferSize=None, mapped=False):
+        """add the content of a file, read once for all of the algorithms"""
+        from .algorithm import BufferSize, fileHash
+
+        fileHash(path, self, bufferSize or BufferSize, mapped)
+
+    def readFrom(self, ioReader, bufferSize=None):
+        """add the content of a binary file object until its end"""
+        from .algorithm import BufferSize, readHash
+
+        readHash(ioReader, self, bufferSize or BufferSize)
+
+    def __copy__(self):
+        """copy the digesters (and the content written so far), with new
+        threads if there are any
+        """
+        executor = None
+        if self.executor:
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(len(self.digesters) - 1)
+        digesters = [copyHasher(digester) for digester in self.digesters]
+        return copyHasher(self, digesters=digesters, executor=executor)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def digests(self):
+        """return the Digest of the content written for each algorithm"""
+        return {digester.alg: digester.digest() for digester in self.digesters}
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def copyHasher(struct, **changes):
+    """return a copy of a struct holding a hash object (e.g., a digester or
+    verifier), with a copy of the hash object so that content written to one
+    isn't written to the other. Hash objects can't be pickled, so neither can
+    these structs, but they can be copied.
+    """
+    restore, args, state = struct.__reduce__()
+    new = restore(*args)
+    new.__dict__.update(state or {}, **changes)
+    hashObj = new.__dict__.get("hash")
+    if hashObj is not None and "hash" not in changes:
+        new.hash = hashObj.copy()
+    return new
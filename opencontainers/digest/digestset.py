@@ -0,0 +1,167 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from .algorithm import anchoredEncodedRegexps
+from .digest import Digest, Parse
+from .exceptions import ErrDigestNotFound, ErrDigestAmbiguous
+import bisect
+
+
+class DigestSet:
+    """DigestSet is used to hold a unique set of digests which may be easily
+    referenced by a string representation of a short digest (e.g.,
+    sha256:7173b8 or 7173b8), as the digestset of the GoLang implementation.
+    Digests are kept in a list sorted by their encoded portion (and
+    algorithm), so a lookup is a binary search.
+    """
+
+    def __init__(self, digests=None):
+        # entries are sorted (encoded, algorithm) tuples
+        self.entries = []
+        if digests:
+            self.addMany(digests)
+
+    def _entry(self, digest):
+        """return the entry for a digest string, without validating it"""
+        algorithm, _, encoded = str.partition(digest, ":")
+        return (encoded, algorithm)
+
+    def _validEntry(self, digest):
+        """return the entry for a digest, validated as for Parse. The encoded
+        portion of a supported algorithm is checked directly, since many
+        digests can be added at once.
+        """
+        entry = self._entry(digest)
+        regexp = anchoredEncodedRegexps.get(entry[1])
+        if regexp is None or not regexp.fullmatch(entry[0]):
+            Parse(digest)
+        return entry
+
+    def add(self, digest):
+        """add a digest (validated as for Parse) to the set"""
+        entry = self._validEntry(digest)
+        index = bisect.bisect_left(self.entries, entry)
+        if index == len(self.entries) or self.entries[index] != entry:
+            self.entries.insert(index, entry)
+
+    def addMany(self, digests):
+        """add many digests at once, sorting the set once"""
+        self.entries.extend(self._validEntry(digest) for digest in digests)
+        self.entries.sort()
+
+        # Remove the duplicates, which are next to each other
+        entries = self.entries
+        self.entries = [
+            entry
+            for index, entry in enumerate(entries)
+            if not index or entries[index - 1] != entry
+        ]
+
+    def remove(self, digest):
+        """remove a digest from the set, if it is in it"""
+        entry = self._entry(digest)
+        index = bisect.bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            del self.entries[index]
+
+    def lookup(self, short):
+        """Lookup looks for a digest matching the given string representation.
+        If no digests could be found ErrDigestNotFound will be raised, and
+        if more than one digest matches ErrDigestAmbiguous. A digest that
+        matches exactly is returned even if it is the prefix of another.
+        """
+        algorithm, _, encoded = short.rpartition(":")
+        if not encoded:
+            raise ErrDigestNotFound()
+
+        found = None
+        entries = self.entries
+        index = bisect.bisect_left(entries, (encoded,))
+        for index in range(index, len(entries)):
+            entry = entries[index]
+            if not entry[0].startswith(encoded):
+                break
+            if algorithm and entry[1] != algorithm:
+                continue
+            if len(entry[0]) == len(encoded):
+                return _digest(entry)
+            if found:
+                raise ErrDigestAmbiguous()
+            found = entry
+
+        if not found:
+            raise ErrDigestNotFound()
+        return _digest(found)
+
+    def shortest(self, digest, length=0):
+        """return the shortest string (of at least length characters) that
+        resolves to a digest of the set with lookup. If another digest has
+        the same encoded portion, the whole digest is needed.
+        """
+        entry = self._entry(digest)
+        index = bisect.bisect_left(self.entries, entry)
+        if index == len(self.entries) or self.entries[index] != entry:
+            raise ErrDigestNotFound()
+        return self._shortCode(index, length)
+
+    def _shortCode(self, index, length):
+        """return the short code for the entry at an index, which only
+        needs to differ from the entries before and after it
+        """
+        encoded = self.entries[index][0]
+        common = 0
+        for neighbor in (index - 1, index + 1):
+            if 0 <= neighbor < len(self.entries):
+                common = max(common, _commonPrefix(encoded, self.entries[neighbor][0]))
+        size = max(common + 1, length)
+        if size >= len(encoded):
+            return str(_digest(self.entries[index]))
+        return encoded[:size]
+
+    def all(self):
+        """All returns all the digests in the set"""
+        return [_digest(entry) for entry in self.entries]
+
+    def __iter__(self):
+        return (_digest(entry) for entry in self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, digest):
+        entry = self._entry(digest)
+        index = bisect.bisect_left(self.entries, entry)
+        return index < len(self.entries) and self.entries[index] == entry
+
+
+def NewSet():
+    """NewSet creates an empty set of digests which may have digests added."""
+    return DigestSet()
+
+
+def ShortCodeTable(dst, length):
+    """ShortCodeTable returns a map of Digest to unique short codes. The
+    length represents the minimum value, the maximum length may be the
+    entire value of digest if uniqueness cannot be achieved without the
+    full value.
+    """
+    return {
+        _digest(entry): dst._shortCode(index, length)
+        for index, entry in enumerate(dst.entries)
+    }
+
+
+def _digest(entry):
+    return Digest("%s:%s" % (entry[1], entry[0]))
+
+
+def _commonPrefix(first, second):
+    """return the length of the common prefix of two strings"""
+    size = min(len(first), len(second))
+    for index in range(size):
+        if first[index] != second[index]:
+            return index
+    return size
@@ -24,3 +24,17 @@ class ErrDigestUnsupported(Exception):
 
     def __init__(self):
         super().__init__("unsupported digest algorithm")
+
+
+class ErrDigestNotFound(Exception):
+    """ErrDigestNotFound is used when a matching digest could not be found in a set."""
+
+    def __init__(self):
+        super().__init__("digest not found")
+
+
+class ErrDigestAmbiguous(Exception):
+    """ErrDigestAmbiguous is used when multiple digests are found in a set."""
+
+    def __init__(self):
+        super().__init__("ambiguous digest string")
@@ -6,7 +6,9 @@
 
 from opencontainers.struct import Struct
 from hashlib import new
-from .digest import Digest, NewDigest
+from .algorithm import BufferSize, fileHash
+from .digest import Digest
+from .digester import copyHasher
 
 
 class hashVerifier(Struct):
@@ -18,16 +20,30 @@ class hashVerifier(Struct):
         self.digest = digest
 
     def write(self, content):
-        """add bytes of content to the hash object"""
-        if not isinstance(content, bytes):
+        """add bytes of content to the hash object. Only the hash is updated,
+        so content can be written in chunks of any size. Bytes, bytearray
+        and memoryview are hashed without copying them.
+        """
+        if isinstance(content, str):
             content = bytes(content, "utf-8")
         self.hash.update(content)
-        self.digest = NewDigest(self.digest.algorithm, self.hash)
-        self.digest.validate()
+
+    def writeFile(self, path, bufferSize=BufferSize, mapped=False):
+        """add the content of a file to the hash object, reading it in chunks
+        or (if mapped is True) memory mapping it, see Algorithm.fromFile
+        """
+        self.hash = fileHash(path, self.hash, bufferSize, mapped)
+
+    def __copy__(self):
+        return copyHasher(self)
+
+    def __deepcopy__(self, memo):
+        return copyHasher(self)
 
     def verified(self):
-        """calculate the hex digest against the digest"""
-        return self.digest == NewDigest(self.digest.algorithm, self.hash)
+        """compare the digest of the content written with the expected digest"""
+        algorithm = self.digest.algorithm
+        return algorithm.encode(self.hash.digest()) == self.digest.encoded()
 
 
 # The GoLang implementation has another Verifier class, not used here
@@ -8,13 +8,13 @@ with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 """
 
-from .defaults import DEFAULT_USER_AGENT, URL_REGEX
+from opencontainers.regexp import AuthHeaderRegexp
+from .defaults import DEFAULT_USER_AGENT, URL_REGEXP
 from .request import RequestConfig, RequestClient
 from .config import BaseConfig
 from copy import deepcopy
 
 import sys
-import re
 import requests
 import urllib.parse
 
@@ -48,7 +48,7 @@ class ClientConfig(BaseConfig):
     def _validate(self):
         """Custom validation on top of BaseConfig validation."""
         # Validation 2: Address starts with http
-        if not re.search(URL_REGEX, self.Address):
+        if not URL_REGEXP.search(self.Address):
             raise ValueError("%s does not appear to be a http address." % self.Address)
 
 
@@ -216,8 +216,7 @@ class NewClient:
 
 def parseAuthHeader(authHeaderRaw):
     """parse authentication header into pieces"""
-    regex = re.compile('([a-zA-z]+)="(.+?)"')
-    matches = regex.findall(authHeaderRaw)
+    matches = AuthHeaderRegexp.findall(authHeaderRaw)
     lookup = dict()
     for match in matches:
         lookup[match[0]] = match[1]
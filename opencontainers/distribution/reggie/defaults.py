@@ -9,6 +9,7 @@ with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 """
 
 from opencontainers.version import __version__
+from opencontainers.regexp import compile_regexp
 
 DEFAULT_USER_AGENT = "reggie-python/%s (https://github.com/vsoch/oci-python)" % (
     __version__
@@ -16,4 +17,5 @@ DEFAULT_USER_AGENT = "reggie-python/%s (https://github.com/vsoch/oci-python)" %
 URL_REGEX = (
     "http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
 )
+URL_REGEXP = compile_regexp(URL_REGEX)
 VALID_METHODS = ["HEAD", "GET", "POST", "PATCH", "PUT", "DELETE", "OPTIONS"]
@@ -5,7 +5,7 @@
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
 from opencontainers.logger import bot
 
 # ErrRegistry is the string returned by and ErrorResponse error.
@@ -15,12 +15,14 @@ ErrRegistry = "distribution: registry returned error"
 class ErrorInfo(Struct):
     """ErrorInfo describes a server error returned from a registry."""
 
-    def __init__(self, code, message, detail):
-        super().__init__()
-        self.newAttr(name="Code", attType=str, jsonName="code", required=True)
-        self.newAttr(name="Message", attType=str, jsonName="message", required=True)
-        self.newAttr(name="Detail", attType=str, jsonName="detail", required=True)
+    schema = [
+        StructAttr(name="Code", attType=str, jsonName="code", required=True),
+        StructAttr(name="Message", attType=str, jsonName="message", required=True),
+        StructAttr(name="Detail", attType=str, jsonName="detail", required=True),
+    ]
 
+    def __init__(self, code=None, message=None, detail=None):
+        super().__init__()
         self.add("Code", code)
         self.add("Message", message)
         self.add("Detail", detail)
@@ -29,11 +31,14 @@ class ErrorInfo(Struct):
 class ErrorResponse(Struct):
     """ErrorResponse is returned by a registry on an invalid request."""
 
+    schema = [
+        StructAttr(
+            name="Errors", attType=[ErrorInfo], jsonName="errors", required=True
+        ),
+    ]
+
     def __init__(self, errors=None):
         super().__init__()
-        self.newAttr(
-            name="Errors", attType=[ErrorInfo], jsonName="errors", required=True
-        )
         self.add("Errors", errors or [])
 
     def Error(self):
@@ -42,15 +47,18 @@ class ErrorResponse(Struct):
 
     def Detail(self):
         """Detail returns an ErrorInfo"""
-        return self.attrs.get("Errors").value
+        return self.get("Errors")
 
 
 class ErrRegistry(Struct):
     """ErrorResponse is returned by a registry on an invalid request."""
 
+    schema = [
+        StructAttr(
+            name="Errors", attType=[ErrorInfo], jsonName="errors", required=True
+        ),
+    ]
+
     def __init__(self, errors=None):
         super().__init__()
-        self.newAttr(
-            name="Errors", attType=[ErrorInfo], jsonName="errors", required=True
-        )
         self.add("Errors", errors or [])
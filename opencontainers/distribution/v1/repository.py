@@ -5,16 +5,19 @@
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
 from opencontainers.logger import bot
 
 
 class RepositoryList(Struct):
     """RepositoryList returns a catalog of repositories maintained on the registry."""
 
+    schema = [
+        StructAttr(
+            name="Repositories", attType=[str], jsonName="repositories", required=True
+        ),
+    ]
+
     def __init__(self, repositories=None):
         super().__init__()
-        self.newAttr(
-            name="Repositories", attType=[str], jsonName="repositories", required=True
-        )
         self.add("Repositories", repositories or [])
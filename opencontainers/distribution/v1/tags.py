@@ -5,16 +5,19 @@
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
 from opencontainers.logger import bot
 
 
 class TagList(Struct):
     """TagList is a list of tags for a given repository."""
 
-    def __init__(self, name, tags=None):
+    schema = [
+        StructAttr(name="Name", attType=str, jsonName="name", required=True),
+        StructAttr(name="Tags", attType=[str], jsonName="tags", required=True),
+    ]
+
+    def __init__(self, name=None, tags=None):
         super().__init__()
-        self.newAttr(name="Name", attType=str, jsonName="name", required=True)
-        self.newAttr(name="Name", attType=[str], jsonName="tags", required=True)
         self.add("Name", name)
         self.add("Tags", tags or [])
@@ -4,8 +4,10 @@
 # Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
+from opencontainers.regexp import EnvRegexp
 from opencontainers.digest import Digest
+from .mediatype import MediaTypeImageConfig
 
 from datetime import datetime
 
@@ -15,6 +17,27 @@ class ImageConfig(Struct):
     base when running a container using an image.
     """
 
+    schema = [
+        # User defines the username or UID which the process in the container should run as.
+        StructAttr(name="User", attType=str),
+        # ExposedPorts a set of ports to expose from a container running this image.
+        StructAttr(name="ExposedPorts", attType=dict),
+        # Env is a list of environment variables to be used in a container.
+        StructAttr(name="Env", attType=[str], regexp=EnvRegexp),
+        # Entrypoint defines a list of arguments to use as the command to execute when the container starts.
+        StructAttr(name="Entrypoint", attType=list),
+        # Cmd defines the default arguments to the entrypoint of the container.
+        StructAttr(name="Cmd", attType=list),
+        # Volumes is a set of directories describing where the process is likely write data specific to a container instance.
+        StructAttr(name="Volumes", attType=dict),
+        # WorkingDir sets the current working directory of the entrypoint process in the container.
+        StructAttr(name="WorkingDir", attType=str),
+        # Labels contains arbitrary metadata for the container.
+        StructAttr(name="Labels", attType=dict),
+        # StopSignal contains the system call signal that will be sent to the container to exit.
+        StructAttr(name="StopSignal", attType=str),
+    ]
+
     def __init__(
         self,
         user=None,
@@ -30,35 +53,6 @@ class ImageConfig(Struct):
 
         super().__init__()
 
-        # User defines the username or UID which the process in the container should run as.
-        self.newAttr(name="User", attType=str)
-
-        # ExposedPorts a set of ports to expose from a container running this image.
-        self.newAttr(name="ExposedPorts", attType=dict)
-
-        # Env is a list of environment variables to be used in a container.
-        self.newAttr(
-            name="Env", attType=[str], regexp="^(?P<var_name>.+?)=(?P<var_value>.+)"
-        )
-
-        # Entrypoint defines a list of arguments to use as the command to execute when the container starts.
-        self.newAttr(name="Entrypoint", attType=list)
-
-        # Cmd defines the default arguments to the entrypoint of the container.
-        self.newAttr(name="Cmd", attType=list)
-
-        # Volumes is a set of directories describing where the process is likely write data specific to a container instance.
-        self.newAttr(name="Volumes", attType=dict)
-
-        # WorkingDir sets the current working directory of the entrypoint process in the container.
-        self.newAttr(name="WorkingDir", attType=str)
-
-        # Labels contains arbitrary metadata for the container.
-        self.newAttr(name="Labels", attType=dict)
-
-        # StopSignal contains the system call signal that will be sent to the container to exit.
-        self.newAttr(name="StopSignal", attType=str)
-
         self.add("User", user)
         self.add("ExposedPorts", ports)
         self.add("Env", env)
@@ -73,16 +67,21 @@ class ImageConfig(Struct):
 class RootFS(Struct):
     """RootFS describes a layer content addresses"""
 
-    def __init__(self, rootfs_type=None, diff_ids=None):
-        super().__init__()
-
+    schema = [
         # Type is the type of the rootfs, different from GoLang since type can't be used
-        self.newAttr(name="RootFSType", attType=str, omitempty=False, jsonName="type")
-
+        StructAttr(name="RootFSType", attType=str, omitempty=False, jsonName="type"),
         # DiffIDs is an array of layer content hashes (DiffIDs), in order from bottom-most to top-most.
-        self.newAttr(
-            name="DiffIDs", attType=[Digest], omitempty=False, jsonName="diff_ids"
-        )
+        StructAttr(
+            name="DiffIDs",
+            attType=[Digest],
+            omitempty=False,
+            jsonName="diff_ids",
+            intern=True,
+        ),
+    ]
+
+    def __init__(self, rootfs_type=None, diff_ids=None):
+        super().__init__()
 
         self.add("RootFSType", rootfs_type)
         self.add("DiffIDs", diff_ids)
@@ -91,26 +90,24 @@ class RootFS(Struct):
 class History(Struct):
     """History describes the history of a layer."""
 
-    def __init__(
-        self, created=None, created_by=None, author=None, comment=None, empty_layer=None
-    ):
-
-        super().__init__()
-
+    schema = [
         # Created is the combined date and time at which the layer was created, formatted as defined by RFC 3339, section 5.6.
-        self.newAttr("Created", attType=datetime, jsonName="created")
-
+        StructAttr("Created", attType=datetime, jsonName="created"),
         # CreatedBy is the command which created the layer.
-        self.newAttr("CreatedBy", attType=str, jsonName="created_by")
-
+        StructAttr("CreatedBy", attType=str, jsonName="created_by"),
         # Author is the author of the build point.
-        self.newAttr("Author", attType=str, jsonName="author")
-
+        StructAttr("Author", attType=str, jsonName="author"),
         # Comment is a custom message set when creating the layer.
-        self.newAttr("Comment", attType=str, jsonName="comment")
-
+        StructAttr("Comment", attType=str, jsonName="comment"),
         # EmptyLayer is used to mark if the history item created a filesystem diff.
-        self.newAttr("EmptyLayer", attType=bool, jsonName="empty_layer")
+        StructAttr("EmptyLayer", attType=bool, jsonName="empty_layer"),
+    ]
+
+    def __init__(
+        self, created=None, created_by=None, author=None, comment=None, empty_layer=None
+    ):
+
+        super().__init__()
 
         self.add("Created", created)
         self.add("CreatedBy", created_by)
@@ -125,6 +122,27 @@ class Image(Struct):
     mediatype when marshalled to JSON.
     """
 
+    mediaType = MediaTypeImageConfig
+
+    schema = [
+        # Created is the combined date and time at which the image was created, formatted as defined by RFC 3339, section 5.6.
+        StructAttr("Created", attType=datetime, jsonName="created"),
+        # Author defines the name and/or email address of the person or entity which created and is responsible for maintaining the image.
+        StructAttr("Author", attType=str, jsonName="author"),
+        # Architecture is the CPU architecture which the binaries in this image are built to run on.
+        StructAttr(
+            name="Architecture", attType=str, jsonName="architecture", required=True
+        ),
+        # OS is the name of the operating system which the image is built to run on.
+        StructAttr("OS", attType=str, jsonName="os", required=True),
+        # Config defines the execution parameters which should be used as a base when running a container using the image.
+        StructAttr("Config", attType=ImageConfig, jsonName="config"),
+        # RootFS references the layer content addresses used by the image.
+        StructAttr("RootFS", attType=RootFS, jsonName="rootfs", required=True),
+        # History describes the history of each layer.
+        StructAttr("History", attType=[History], jsonName="history"),
+    ]
+
     def __init__(
         self,
         created=None,
@@ -138,29 +156,6 @@ class Image(Struct):
 
         super().__init__()
 
-        # Created is the combined date and time at which the image was created, formatted as defined by RFC 3339, section 5.6.
-        self.newAttr("Created", attType=datetime, jsonName="created")
-
-        # Author defines the name and/or email address of the person or entity which created and is responsible for maintaining the image.
-        self.newAttr("Author", attType=str, jsonName="author")
-
-        # Architecture is the CPU architecture which the binaries in this image are built to run on.
-        self.newAttr(
-            name="Architecture", attType=str, jsonName="architecture", required=True
-        )
-
-        # OS is the name of the operating system which the image is built to run on.
-        self.newAttr("OS", attType=str, jsonName="os", required=True)
-
-        # Config defines the execution parameters which should be used as a base when running a container using the image.
-        self.newAttr("Config", attType=ImageConfig, jsonName="config")
-
-        # RootFS references the layer content addresses used by the image.
-        self.newAttr("RootFS", attType=RootFS, jsonName="rootfs", required=True)
-
-        # History describes the history of each layer.
-        self.newAttr("History", attType=[History], jsonName="history")
-
         self.add("Created", created)
         self.add("Author", author)
         self.add("Architecture", arch)
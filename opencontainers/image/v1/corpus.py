@@ -0,0 +1,172 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+# Validate a corpus of image documents (e.g., exported from a registry):
+# python -m opencontainers.image.v1.corpus <directory or file>... --workers 8
+
+from opencontainers.validation import collect_errors
+from .config import Image
+from .index import Index
+from .manifest import Manifest
+from .mediatype import MediaTypeImageManifest, MediaTypeImageIndex, MediaTypeImageConfig
+import argparse
+import collections
+import itertools
+import json
+import os
+import sys
+
+# structTypes are the structs of the documents in a corpus, by mediaType
+structTypes = {
+    MediaTypeImageManifest: Manifest,
+    MediaTypeImageIndex: Index,
+    MediaTypeImageConfig: Image,
+}
+
+
+def detect(content):
+    """return the struct (Manifest, Index or Image) of a document by its
+    mediaType, or by its attributes if it doesn't have one (an Image config
+    never has). Return None if the type isn't known.
+    """
+    if not isinstance(content, dict):
+        return None
+    mediaType = content.get("mediaType")
+    if mediaType:
+        return structTypes.get(mediaType)
+    if "manifests" in content:
+        return Index
+    if "layers" in content:
+        return Manifest
+    if "rootfs" in content:
+        return Image
+    return None
+
+
+def iter_paths(paths, extension=".json"):
+    """yield the files with the extension under directories (in order), and
+    files given directly
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(extension):
+                    yield os.path.join(root, name)
+
+
+def scan_file(path):
+    """validate one document, returning a result with the path, mediaType,
+    and the errors found (each with the path of the value in the document)
+    """
+    result = {"path": path, "mediaType": None, "valid": False, "errors": []}
+    try:
+        with open(path, "rb") as fd:
+            content = json.loads(fd.read())
+    except (OSError, ValueError) as e:
+        result["errors"].append({"path": "", "message": str(e)})
+        return result
+
+    structType = detect(content)
+    if not structType:
+        result["errors"].append({"path": "", "message": "unknown document type"})
+        return result
+
+    result["mediaType"] = structType.mediaType
+    for name, message in collect_errors(structType, content):
+        result["errors"].append({"path": name, "message": message})
+    result["valid"] = not result["errors"]
+    return result
+
+
+def _scan_files(paths):
+    """scan a chunk of files in a worker process"""
+    return [scan_file(path) for path in paths]
+
+
+def scan(paths, workers=None, chunksize=256):
+    """yield the result (see scan_file) of each document in files or
+    directories, in order. With workers, chunks of paths are scanned by a
+    pool of processes that read the files themselves, and only a few chunks
+    per process are queued, so a corpus of any size can be streamed.
+
+    Parameters
+    ==========
+    paths: a list of files and directories (searched for .json files)
+    workers: the number of processes to scan with (default, in process)
+    chunksize: the number of files sent to a process at once
+    """
+    files = iter_paths(paths)
+    if not workers or workers <= 1:
+        for path in files:
+            yield scan_file(path)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            chunk = list(itertools.islice(files, chunksize))
+            if chunk:
+                pending.append(executor.submit(_scan_files, chunk))
+            if not pending:
+                break
+            if not chunk or len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+
+
+def write_ndjson(results, stream, invalid_only=False):
+    """write results as newline delimited json (one object per line), and
+    return the number of documents and of invalid documents
+    """
+    count = invalid = 0
+    for result in results:
+        count += 1
+        if not result["valid"]:
+            invalid += 1
+        elif invalid_only:
+            continue
+        stream.write(json.dumps(result) + "\n")
+    return count, invalid
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description="validate manifests, indexes and image configs as ndjson"
+    )
+    parser.add_argument("paths", nargs="+", help="json files or directories")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=256,
+        help="files sent to a process at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--invalid-only", action="store_true", help="only write invalid documents"
+    )
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    results = scan(args.paths, args.workers, args.chunksize)
+    count, invalid = write_ndjson(results, sys.stdout, args.invalid_only)
+    sys.stderr.write("%s documents, %s invalid\n" % (count, invalid))
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,11 @@
 # Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
 from opencontainers.image.specs import Versioned
 from opencontainers.logger import bot
 from .mediatype import MediaTypeImageIndex, MediaTypeImageManifest
 from .descriptor import Descriptor
-import re
 
 
 class Index(Struct):
@@ -18,18 +17,24 @@ class Index(Struct):
     mediatype when marshalled to JSON.
     """
 
-    def __init__(self, manifests=None, schemaVersion=None, annotations=None):
-        super().__init__()
-
-        self.newAttr(name="schemaVersion", attType=Versioned, required=True)
+    mediaType = MediaTypeImageIndex
 
+    schema = [
+        StructAttr(name="schemaVersion", attType=Versioned, required=True),
+        # MediaType specifies the type of this document data structure e.g. `application/vnd.oci.image.index.v1+json`
+        StructAttr(name="MediaType", attType=str, jsonName="mediaType"),
         # Manifests references platform specific manifests.
-        self.newAttr(
+        StructAttr(
             name="Manifests", attType=[Descriptor], jsonName="manifests", required=True
-        )
-
+        ),
         # Annotations contains arbitrary metadata for the image index.
-        self.newAttr(name="Annotations", attType=dict, jsonName="annotations")
+        StructAttr(
+            name="Annotations", attType=dict, jsonName="annotations", intern=True
+        ),
+    ]
+
+    def __init__(self, manifests=None, schemaVersion=None, annotations=None):
+        super().__init__()
 
         self.add("Manifests", manifests)
         self.add("Annotations", annotations)
@@ -41,17 +46,15 @@ class Index(Struct):
         """
         valid_types = [MediaTypeImageManifest, MediaTypeImageIndex]
 
-        manifests = self.attrs.get("Manifests").value
+        manifests = self.get("Manifests")
         if manifests:
             for manifest in manifests:
-                mediaType = manifest.attrs.get("MediaType")
-                if mediaType.value not in valid_types:
+                mediaType = manifest.get("MediaType")
+                if mediaType not in valid_types:
 
                     # Case 1: it's a custom media type (allowed) but give warning
-                    if mediaType.validate_regexp(mediaType.value):
-                        bot.warning(
-                            "%s is valid, but not registered." % mediaType.value
-                        )
+                    if manifest._fields["MediaType"].validate_regexp(mediaType):
+                        bot.warning("%s is valid, but not registered." % mediaType)
 
                     # Case 2: not valid and doesn't match regular expression
                     else:
@@ -4,7 +4,9 @@
 # Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
+from opencontainers.regexp import ImageLayoutVersionRegexp
+from .mediatype import MediaTypeLayoutHeader
 
 # ImageLayoutFile is the file name of oci image layout file
 ImageLayoutFile = "oci-layout"
@@ -18,16 +20,19 @@ class ImageLayout(Struct):
     of an OCI Image-layout directory.
     """
 
-    def __init__(self, version=None):
-        super().__init__()
+    mediaType = MediaTypeLayoutHeader
 
+    schema = [
         # This is for semver, but without the v
-        regexp = r"^(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patchlevel>\d+)~?(?P<special>[a-z]\w+[\d+])?$"
-        self.newAttr(
+        StructAttr(
             name="Version",
             attType=str,
             jsonName="imageLayoutVersion",
             required=True,
-            regexp=regexp,
-        )
+            regexp=ImageLayoutVersionRegexp,
+        ),
+    ]
+
+    def __init__(self, version=None):
+        super().__init__()
         self.add("Version", version or ImageLayoutVersion)
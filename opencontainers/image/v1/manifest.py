@@ -4,11 +4,12 @@
 # Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-from opencontainers.struct import Struct
+from opencontainers.struct import Struct, StructAttr
 from opencontainers.image.specs import Versioned
 from opencontainers.logger import bot
 from .descriptor import Descriptor
 from .mediatype import (
+    MediaTypeImageManifest,
     MediaTypeImageConfig,
     MediaTypeImageLayer,
     MediaTypeImageLayerGzip,
@@ -24,26 +25,29 @@ class Manifest(Struct):
     mediatype structure when marshalled to JSON.
     """
 
-    def __init__(
-        self, manifestConfig=None, layers=None, schemaVersion=None, annotations=None
-    ):
-        super().__init__()
-
-        self.newAttr(name="schemaVersion", attType=Versioned, required=True)
+    mediaType = MediaTypeImageManifest
 
+    schema = [
+        StructAttr(name="schemaVersion", attType=Versioned, required=True),
+        # MediaType specifies the type of this document data structure e.g. `application/vnd.oci.image.manifest.v1+json`
+        StructAttr(name="MediaType", attType=str, jsonName="mediaType"),
         # Config references a configuration object for a container, by digest.
         # The referenced configuration object is a JSON blob that the runtime uses to set up the container.
-        self.newAttr(
-            name="Config", attType=Descriptor, jsonName="config", required=True
-        )
-
+        StructAttr(name="Config", attType=Descriptor, jsonName="config", required=True),
         # Layers is an indexed list of layers referenced by the manifest.
-        self.newAttr(
+        StructAttr(
             name="Layers", attType=[Descriptor], jsonName="layers", required=True
-        )
-
+        ),
         # Annotations contains arbitrary metadata for the image manifest.
-        self.newAttr(name="Annotations", attType=dict, jsonName="annotations")
+        StructAttr(
+            name="Annotations", attType=dict, jsonName="annotations", intern=True
+        ),
+    ]
+
+    def __init__(
+        self, manifestConfig=None, layers=None, schemaVersion=None, annotations=None
+    ):
+        super().__init__()
 
         self.add("Config", manifestConfig)
         self.add("Layers", layers)
@@ -62,13 +66,13 @@ class Manifest(Struct):
     def _validateConfigMediaType(self):
         """validate the config media type."""
         # The media type of the config must be for the config
-        manifestConfig = self.attrs.get("Config").value
+        manifestConfig = self.get("Config")
 
         # Missing config is not valid
         if not manifestConfig:
             return False
 
-        mediaType = manifestConfig.attrs.get("MediaType").value
+        mediaType = manifestConfig.get("MediaType")
         if not mediaType:
             return False
 
@@ -93,13 +97,13 @@ class Manifest(Struct):
         ]
 
         # No layers, not valid
-        layers = self.attrs.get("Layers").value
+        layers = self.get("Layers")
         if layers == None:
             return False
 
         # Check against valid mediaType Layers
         for layer in layers:
-            mediaType = layer.attrs.get("MediaType").value
+            mediaType = layer.get("MediaType")
             if mediaType not in layerMediaTypes:
                 bot.error("layer mediaType %s is invalid" % mediaType)
                 return False
@@ -0,0 +1,112 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import sys
+import weakref
+
+# tables holds the InternTable for each string struct type (e.g., Digest)
+tables = {}
+
+
+class InternTable:
+    """an InternTable returns one shared instance for equal values, so that
+    a value repeated across many structs (e.g., the digest of a base layer)
+    is only held once. By default the table holds weak references, so a
+    value is dropped when no struct uses it anymore. If maxsize is set,
+    values aren't added when the table is full (they are still returned).
+    """
+
+    def __init__(self, maxsize=None, weak=True):
+        self.configure(maxsize, weak)
+
+    def configure(self, maxsize=None, weak=True):
+        """set the maximum size and kind of references, clearing the table"""
+        self.maxsize = maxsize
+        self.weak = weak
+        self.values = {}
+
+    def intern(self, value):
+        """return the shared instance equal to value, adding it if needed"""
+        if not isinstance(value, str):
+            return value
+        shared = self.values.get(value)
+        if shared is not None:
+            if not self.weak:
+                return shared
+            shared = shared()
+            if shared is not None:
+                return shared
+
+        if self.maxsize is None or len(self.values) < self.maxsize:
+            if self.weak:
+                # The key can't be the value, or it would keep it alive
+                key = str.__str__(value)
+                self.values[key] = weakref.KeyedRef(value, self._remove, key)
+            else:
+                self.values[value] = value
+        return value
+
+    def _remove(self, ref):
+        """remove the entry of a value that no longer exists"""
+        if self.values.get(ref.key) is ref:
+            del self.values[ref.key]
+
+    def clear(self):
+        self.values.clear()
+
+    def __len__(self):
+        return len(self.values)
+
+
+def table_for(attType):
+    """return the InternTable for a string struct type, creating it"""
+    table = tables.get(attType)
+    if table is None:
+        table = tables[attType] = InternTable()
+    return table
+
+
+def intern_str(value):
+    """intern a string, leaving subclasses (and other types) as they are"""
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def intern_keys(value):
+    """return a copy of a dictionary (e.g., annotations) with interned keys"""
+    if isinstance(value, dict):
+        return {intern_str(key): item for key, item in value.items()}
+    return value
+
+
+def intern_items(value, interner):
+    """return a copy of a list with its items interned"""
+    if isinstance(value, list):
+        return [interner(item) for item in value]
+    return value
+
+
+def interner_for(attType):
+    """return the function to intern values of an attribute type, or None
+    for types that aren't interned.
+    """
+    from opencontainers.struct import StrStruct
+
+    # A list of values is interned item by item
+    if isinstance(attType, list):
+        interner = interner_for(attType[0]) if attType else None
+        if interner:
+            return lambda value: intern_items(value, interner)
+        return None
+
+    if attType is str:
+        return intern_str
+    if attType is dict:
+        return intern_keys
+    if isinstance(attType, type) and issubclass(attType, StrStruct):
+        return table_for(attType).intern
+    return None
@@ -4,8 +4,10 @@
 # Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import contextlib
 import os
 import sys
+import threading
 
 ABORT = -5
 CRITICAL = -4
@@ -27,6 +29,17 @@ DARKRED = "\033[31m"
 CYAN = "\033[36m"
 
 
+class ExitError(Exception):
+    """ExitError is raised by exit instead of exiting, when messages are being
+    collected (see OCILogger.collecting).
+    """
+
+    def __init__(self, message, return_code=1):
+        super().__init__(message)
+        self.message = message
+        self.return_code = return_code
+
+
 class OCILogger:
     def __init__(self, logfile=None, level=None):
         """the logger is based on discovery in the environment, and is
@@ -44,6 +57,7 @@ class OCILogger:
         self.errorStream = sys.stderr
         self.outputStream = sys.stdout
         self.colorize = self.useColor()
+        self.collected = threading.local()
         self.colors = {
             ABORT: DARKRED,
             CRITICAL: RED,
@@ -168,12 +182,35 @@ class OCILogger:
         self.emit(CRITICAL, message, "CRITICAL")
 
     def error(self, message):
+        messages = getattr(self.collected, "messages", None)
+        if messages is not None:
+            return messages.append(message)
         self.emit(ERROR, message, "ERROR")
 
     def exit(self, message, return_code=1):
+        messages = getattr(self.collected, "messages", None)
+        if messages is not None:
+            messages.append(message)
+            raise ExitError(message, return_code)
         self.emit(ERROR, message, "ERROR")
         sys.exit(return_code)
 
+    @contextlib.contextmanager
+    def collecting(self):
+        """collect error messages (of this thread) in a list instead of
+        printing them, and raise ExitError instead of exiting. This is used
+        to validate many documents in one process:
+
+        with bot.collecting() as messages:
+            ...
+        """
+        previous = getattr(self.collected, "messages", None)
+        self.collected.messages = messages = []
+        try:
+            yield messages
+        finally:
+            self.collected.messages = previous
+
     def warning(self, message):
         self.emit(WARNING, message, "WARNING")
 
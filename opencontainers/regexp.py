@@ -0,0 +1,80 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import re
+
+# patterns is the registry of compiled regular expressions, keyed by the
+# pattern string and flags. Validation should use the compiled patterns
+# directly instead of passing strings to the re module functions.
+patterns = {}
+
+
+def compile_regexp(pattern, flags=0):
+    """return the compiled regular expression for a pattern from the registry,
+    compiling and registering it on first use. A compiled pattern is
+    returned as is.
+    """
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    key = (pattern, flags)
+    regexp = patterns.get(key)
+    if regexp is None:
+        regexp = patterns[key] = re.compile(pattern, flags)
+    return regexp
+
+
+# Image specification
+
+# MediaTypeRegexp matches a media type, with a type and subtype.
+MediaTypeRegexp = compile_regexp(
+    "^[A-Za-z0-9][A-Za-z0-9!#$&-^_.+]{0,126}/[A-Za-z0-9][A-Za-z0-9!#$&-^_.+]{0,126}$"
+)
+
+# URLRegexp matches a url of a descriptor.
+URLRegexp = compile_regexp(
+    r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\), ]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
+)
+
+# EnvRegexp matches an environment variable of an image config.
+EnvRegexp = compile_regexp("^(?P<var_name>.+?)=(?P<var_value>.+)")
+
+# ImageLayoutVersionRegexp is for semver, but without the v
+ImageLayoutVersionRegexp = compile_regexp(
+    r"^(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patchlevel>\d+)~?(?P<special>[a-z]\w+[\d+])?$"
+)
+
+# RFC3339Regexp matches an RFC 3339 date and time, with any fraction of a second.
+RFC3339Regexp = compile_regexp(
+    r"^(?P<seconds>\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}:\d{2})(?:\.(?P<fraction>\d+))?"
+    r"(?P<offset>[Zz]|[+-]\d{2}:\d{2})$"
+)
+
+# Digests
+
+# DigestRegexp matches valid digest types.
+DigestRegexp = compile_regexp("[a-z0-9]+(?:[.+_-][a-z0-9]+)*:[a-zA-Z0-9=_-]+")
+
+# DigestRegexpAnchored matches valid digest types, anchored to the start and end of the match.
+DigestRegexpAnchored = compile_regexp("^%s$" % DigestRegexp.pattern)
+
+# AlgorithmSeparatorRegexp matches the separator of an extra algorithm component.
+AlgorithmSeparatorRegexp = compile_regexp("[+._-]")
+
+# AlgorithmNameRegexp matches the name of an algorithm, without extra components.
+AlgorithmNameRegexp = compile_regexp("^[a-z0-9]+$")
+
+# FullDigestRegexp splits a full digest into the algorithm and digest.
+FullDigestRegexp = compile_regexp("^(?P<algorithm>.+?):(?P<digest>.+)")
+
+# Distribution (reggie)
+
+# RequestTemplateRegexp matches unfilled template strings of a request url.
+RequestTemplateRegexp = compile_regexp(
+    "<name>|<reference>|<digest>|<session_id>|//{2,}"
+)
+
+# AuthHeaderRegexp matches the key="value" pairs of a Www-Authenticate header.
+AuthHeaderRegexp = compile_regexp('([a-zA-z]+)="(.+?)"')
@@ -0,0 +1,137 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.logger import bot
+import codecs
+import json
+
+# decoder decodes one json value at a time from the buffer
+decoder = json.JSONDecoder()
+
+whitespace = " \t\n\r"
+
+
+def iter_json_array(stream, key, chunk_size=65536):
+    """yield the items of the array for key in a json object, reading the
+    stream incrementally. Only one item (and a chunk) is kept in memory at a
+    time, so a large document (e.g., an index.json or a registry catalog)
+    doesn't need to be loaded. Reading stops at the end of the array, so
+    the rest of the document is not checked. Nothing is yielded if the key
+    is missing.
+
+    Parameters
+    ==========
+    stream: a file object (text or binary) or an iterable of chunks, such as
+            response.iter_content() of a requests response with stream=True
+    key: the key of the array in the top level object
+    chunk_size: the number of bytes (or characters) to read at once
+    """
+    buffer = JsonBuffer(stream, chunk_size)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+
+    while True:
+        name = buffer.value()
+        buffer.expect(":")
+
+        if name == key:
+            if buffer.peek() != "[":
+                bot.exit("%s is not a list." % key)
+            buffer.expect("[")
+            if buffer.peek() == "]":
+                return
+            while True:
+                yield buffer.value()
+                if buffer.expect(",]") == "]":
+                    return
+
+        # Skip the values of other keys
+        buffer.value()
+        if buffer.expect(",}") == "}":
+            return
+
+
+class JsonBuffer:
+    """a JsonBuffer holds the text of a stream that hasn't been decoded yet,
+    reading more of the stream when a value isn't complete.
+    """
+
+    def __init__(self, stream, chunk_size=65536):
+        self.chunks = _read_chunks(stream, chunk_size)
+        self.text = ""
+        self.pos = 0
+
+    def fill(self):
+        """read another chunk, dropping the text already decoded. Return
+        False at the end of the stream.
+        """
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """skip whitespace, and return the next character ("" at the end)"""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in whitespace:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        """consume and return the next character, which must be in chars"""
+        char = self.peek()
+        if not char or char not in chars:
+            bot.exit(
+                "Invalid json, expected %s but found %s"
+                % (" or ".join(chars), repr(char) if char else "the end")
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """decode and return the next json value"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fill():
+                    continue
+                bot.exit("Invalid json: %s" % e)
+
+            # A number at the end of the text might continue in the next chunk
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _read_chunks(stream, chunk_size):
+    """yield the text of a file object or iterable of chunks, decoding bytes
+    as utf-8 (a character can be split across chunks).
+    """
+    if hasattr(stream, "read"):
+        read = stream.read
+        stream = iter(lambda: read(chunk_size), read(0))
+
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    for chunk in stream:
+        if not isinstance(chunk, str):
+            chunk = utf8.decode(chunk)
+        if chunk:
+            yield chunk
+
+    tail = utf8.decode(b"", final=True)
+    if tail:
+        yield tail
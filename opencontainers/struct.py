@@ -5,10 +5,13 @@
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from opencontainers.logger import bot
+from opencontainers.regexp import compile_regexp
+from opencontainers.intern import interner_for
+from opencontainers.timestamp import Timestamp, parse_timestamp, to_timestamp
 from datetime import datetime
 import copy
 import json
-import re
+import weakref
 
 
 class StructAttr(object):
@@ -25,27 +28,41 @@ class StructAttr(object):
     jsonName: the name to serialize to json (not required, will use name)
     value: optionally, provide a value on init
     omitempty: if true, don't serialize with response.
+    regexp: a pattern string or compiled regular expression to check strings
+    intern: share one instance of values repeated across structs (strings,
+            string structs like Digest, and the keys of dictionaries)
+
+    A StructAttr is a definition shared by all instances of a Struct class,
+    so it only holds a value when it is used on its own. The copies returned
+    by Struct.attrs are bound to a struct, and get and set its value.
     """
 
     def __init__(
         self,
         name,
         attType,
-        required,
+        required=False,
         jsonName=None,
         value=None,
         omitempty=True,
         regexp=None,
         hide=False,
+        intern=False,
     ):
         self.name = name
+        self._struct = None
         self.value = value
         self.attType = attType
         self.required = required
-        self.regexp = regexp or ""
+        self.regexp = compile_regexp(regexp) if regexp else None
         self.jsonName = jsonName or name
         self.omitempty = omitempty
         self.hide = hide
+        self.interner = interner_for(attType) if intern else None
+        self._dispatch()
+
+        # The position of the value in the Struct value store, set on compile
+        self.index = None
 
     def __str__(self):
         return "<opencontainers.struct.StructAttr-%s:%s>" % (self.name, self.value)
@@ -58,73 +75,172 @@ class StructAttr(object):
         # We can provide a nested attType to check
         if not attType:
             attType = self.attType
-        try:
-            return (
-                Struct in attType.__bases__
-                or StrStruct in attType.__bases__
-                or IntStruct in attType.__bases__
-            )
-        except:
-            return False
+        return isinstance(attType, type) and issubclass(attType, Struct)
+
+    def _dispatch(self):
+        """choose the functions to load, validate and encode values of the
+        attribute type once, so that each value only needs one call:
+
+        loader: return a raw value with any nested structs populated
+        type_validator: check that a loaded value has the attribute type
+        validator: check the regular expression (if any) and type
+        encoder: return the json representation of a valid value
+        """
+        attType = self.attType
+        self.loader = self._load_value
+        self.encoder = self._encode_value
+
+        if isinstance(attType, list):
+            child = attType[0] if attType else None
+            self.type_validator = self._validate_list
+            self.encoder = self._encode_list
+            if child is None:
+                self.type_validator = self._validate_untyped_list
+            elif self._is_struct(child):
+                self.loader = self._load_list
+                if not issubclass(child, (str, int)):
+                    self.encoder = self._encode_struct_list
+
+        elif attType == datetime:
+            self.loader = self._load_datetime
+            self.type_validator = self.validate_datetime
+
+        elif self._is_struct(attType):
+            self.loader = self._load_nested
+            self.type_validator = self._validate_instance
+            if not issubclass(attType, (str, int)):
+                self.encoder = self._encode_struct
+
+        else:
+            self.type_validator = self._validate_instance
+            if attType is list:
+                self.encoder = self._encode_list
+
+        self.validator = self.type_validator
+        if self.regexp:
+            self.validator = self._validate_regexp_and_type
+
+    def bind(self, struct):
+        """return a copy of the attribute definition bound to a struct, whose
+        value (in the struct) is got and set as the value of the copy
+        """
+        att = copy.copy(self)
+        att._struct = struct
+        return att
+
+    @property
+    def value(self):
+        if self._struct is not None:
+            return self._struct._values[self.index]
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        struct = self._struct
+        if struct is None:
+            self._value = value
+            return
+        struct._check_frozen()
+        struct._values[self.index] = value
+        struct.invalidate()
 
     def set(self, value):
         """set a new value, and validate the type. Return true if set"""
-        # First pass, it might be another object to add
-        if self._is_struct():
-            newStruct = self.attType()
-            value = newStruct.load(value)
-
-        # If it's a list with another type
-        elif isinstance(self.attType, list) and self.attType:
-            child = self.attType[0]
-
-            # It's either a nested structure
-            if self._is_struct(child):
-
-                # If we have a list of values, generate them
-                if isinstance(value, list):
-                    values = []
-                    for v in value:
-                        newStruct = child()
-                        values.append(newStruct.load(v))
-                    value = values
-                else:
-                    newStruct = child()
-                    value = newStruct.load(value)
+        value = self.loader(value)
+        if not self.validator(value):
+            return False
+        if self.interner:
+            value = self.interner(value)
+        self.value = value
+        return True
+
+    def load(self, value, trust=False, lazy=False):
+        """given a raw value, return it with any nested structs populated.
+        If trust is True, nested structs are loaded without validation, and
+        if lazy is also True a list of them is only built when accessed.
+        """
+        return self.loader(value, trust, lazy)
+
+    def _load_value(self, value, trust=False, lazy=False):
+        return value
 
+    def _load_datetime(self, value, trust=False, lazy=False):
+        # An RFC 3339 string is stored as a Timestamp, holding the parsed time
+        return to_timestamp(value)
+
+    def _load_nested(self, value, trust=False, lazy=False):
+        return self._load_struct(self.attType, value, trust)
+
+    def _load_list(self, value, trust=False, lazy=False):
+        child = self.attType[0]
+
+        # Trusted lists of structs can be built on access
+        if lazy and isinstance(value, list) and not issubclass(child, (str, int)):
+            return LazyList(child, value)
+
+        # If we have a list of values, generate them
+        if isinstance(value, list):
+            return [self._load_struct(child, v, trust) for v in value]
+        return self._load_struct(child, value, trust)
+
+    def _load_struct(self, attType, value, trust=False):
+        """load a nested struct. A struct that is already loaded is kept (and
+        can be shared) if it is valid, while string and int structs are
+        loaded again so that they are validated.
+        """
+        if isinstance(value, attType) and not isinstance(value, (str, int)):
+            return value if trust else reuse_struct(value)
+        newStruct = attType()
+        return newStruct.load(value, trust=trust)
+
+    def is_valid(self, value):
+        """validate a loaded value against the regular expression and type"""
+        return self.validator(value)
+
+    def _validate_regexp_and_type(self, value):
         # If we have a string with a regular expression
         if not self.validate_regexp(value):
             return False
+        return self.type_validator(value)
 
-        if self.validate_type(value):
-            self.value = value
-            return True
-        return False
-
-    def to_dict(self):
-        """return a dictionary representation of the attribute. This won't
-        be called unless the attribute in question is a struct.
+    def to_dict(self, value=None):
+        """return a dictionary representation of a value for the attribute
+        (defaults to the value it holds). Nested structs (or lists of them)
+        are converted with their to_dict.
         """
-        if isinstance(self.value, (str, int)):
-            return self.value
-
-        if isinstance(self.value, list):
-            items = []
-            for item in self.value:
-                if isinstance(item, (str, int)):
-                    items.append(item)
-                elif isinstance(item, (Struct, StrStruct, IntStruct)):
-                    items.append(item.to_dict())
-                else:
-                    items.append(item)
-            return items
+        if value is None:
+            value = self.value
+        return self.encoder(value)
+
+    def _encode_value(self, value):
+        return value
+
+    def _encode_struct(self, value):
+        return value.to_dict()
 
-        return self.value.to_dict()
+    def _encode_struct_list(self, value):
+        return [item.to_dict() for item in value]
+
+    def _encode_list(self, value):
+        items = []
+        for item in value:
+            if isinstance(item, Struct) and not isinstance(item, (str, int)):
+                items.append(item.to_dict())
+            else:
+                items.append(item)
+        return items
 
     def validate_datetime(self, value):
-        """validate a datetime string, but be generous to only check day,
+        """validate a datetime string. An RFC 3339 string is valid (and a
+        Timestamp already is), otherwise be generous to only check day,
         month, year. This is a road nobody wants to go down.
         """
+        if isinstance(value, Timestamp):
+            return True
+        if not isinstance(value, str):
+            return False
+        if parse_timestamp(value):
+            return True
         value = value.split("T")[0]
         try:  # "2015-10-31T22:22:56.015925234Z"
             datetime.strptime(value, "%Y-%m-%d")
@@ -145,8 +261,10 @@ class StructAttr(object):
 
         for entry in value:
             if isinstance(entry, str):
-                if not re.search(self.regexp, entry):
-                    bot.error("%s failed regex validation %s " % (entry, self.regexp))
+                if not self.regexp.search(entry):
+                    bot.error(
+                        "%s failed regex validation %s " % (entry, self.regexp.pattern)
+                    )
                     return False
         return True
 
@@ -154,27 +272,23 @@ class StructAttr(object):
         """ensure that an attribute is of the correct type. If we are given
         a list as type, then the value within it is the type we are checking.
         """
-        # If it's a list with something inside
-        if isinstance(self.attType, list):
+        return self.type_validator(value)
 
-            # If value not a list, invalid
-            if not isinstance(value, list):
-                return False
+    def _validate_instance(self, value):
+        return isinstance(value, self.attType)
 
-            # A type to check is inside
-            if self.attType:
-                attType = self.attType[0]
-                for entry in value:
-                    if not isinstance(entry, attType):
-                        return False
+    def _validate_untyped_list(self, value):
+        return isinstance(value, list)
 
-        # If it's a datetime, should be valid string
-        elif self.attType == datetime:
-            return self.validate_datetime(value)
+    def _validate_list(self, value):
+        # If value not a list, invalid
+        if not isinstance(value, list):
+            return False
 
-        # Otherwise, validate as is
-        else:
-            if not isinstance(value, self.attType):
+        # A type to check is inside
+        attType = self.attType[0]
+        for entry in value:
+            if not isinstance(entry, attType):
                 return False
         return True
 
@@ -182,12 +296,130 @@ class StructAttr(object):
 class Struct(object):
     """a Struct is a general base class that allows for printing
     and validating a set of attributes according to their defined subclass.
-    the subclass should have an init function that uses the functions
-    here to add required attributes.
+    the subclass should declare its attributes once as a class level schema,
+    a list of StructAttr that is compiled when the class is created. Each
+    instance then only holds a list of values, one per attribute.
+
+    The serialized forms of a Struct (to_dict, to_json and to_canonical_bytes)
+    are cached until a value of the struct, or of a nested struct, is changed
+    with add or load.
+
+    A Struct can be frozen (see freeze) to make it immutable. Frozen structs
+    are equal if they have the same class and canonical json, and can be
+    hashed (e.g., to deduplicate descriptors with a set).
     """
 
+    schema = []
+
+    # The media type of the struct when marshalled to json, if it has one
+    mediaType = None
+
+    # Compiled lookups of attributes by name and by jsonName, and the indices
+    # of attributes that hold nested structs
+    _fields = {}
+    _json_lookup = {}
+    _nested = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "schema" in cls.__dict__:
+            cls._compile_schema()
+
+    @classmethod
+    def _compile_schema(cls):
+        """compile the class schema into attribute lookups by name and jsonName,
+        and assign each attribute its index in the value store.
+        """
+        cls._fields = {}
+        cls._json_lookup = {}
+        for index, att in enumerate(cls.schema):
+            if att.name in cls._fields:
+                raise ValueError("%s is defined twice for %s" % (att.name, cls))
+            att.index = index
+            cls._fields[att.name] = att
+            cls._json_lookup[att.jsonName] = att
+        cls._nested = _nested_indices(cls._fields)
+
     def __init__(self):
-        self.attrs = {}
+        self._values = [None] * len(self._fields)
+
+    @classmethod
+    def compile(cls):
+        """opt in to load and to_dict functions generated from the schema of
+        this class (and nested classes), which avoid the generic attribute
+        lookups. The result is cached on the class.
+        """
+        from opencontainers.codegen import compile_struct
+
+        return compile_struct(cls)
+
+    @classmethod
+    def from_dict(cls, content, validate=True, trust=False, lazy=False):
+        """create a new Struct and load a dictionary into it. See load for
+        loading trusted content without validation.
+        """
+        return cls().load(content, validate, trust, lazy)
+
+    def __reduce__(self):
+        """pickle the values of a struct and the other attributes of the
+        instance (e.g., attributes added with newAttr, or set by a subclass)
+        without the cache and parents, so it is restored without loading or
+        validating it again. This is used by copy and deepcopy too.
+        """
+        state = {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in ("_values", "_cache", "_parents")
+        }
+        return (_restore, (self.__class__, self._values), state or None)
+
+    def __eq__(self, other):
+        """frozen structs are equal if they have the same class and canonical
+        json, other structs only if they are the same object.
+        """
+        if self is other:
+            return True
+        if (
+            "_frozen" not in self.__dict__
+            or not isinstance(other, Struct)
+            or "_frozen" not in other.__dict__
+        ):
+            return NotImplemented
+        return (
+            self.__class__ is other.__class__
+            and hash(self) == hash(other)
+            and self.to_canonical_bytes() == other.to_canonical_bytes()
+        )
+
+    def __hash__(self):
+        if "_frozen" not in self.__dict__:
+            return object.__hash__(self)
+        return self._cached("hash", lambda: hash(self.to_canonical_bytes()))
+
+    def freeze(self):
+        """make the struct, and the structs, lists and dictionaries it holds,
+        immutable. The struct must be valid. Changing a frozen struct (e.g.,
+        with add or load) is an error, but with_changes can derive a new one.
+        Return the struct.
+        """
+        if "_frozen" in self.__dict__:
+            return self
+        if not self.validate():
+            bot.exit("%s is invalid" % self)
+        self._values = [_freeze(value) for value in self._values]
+        self._frozen = True
+        return self
+
+    def _check_frozen(self):
+        if "_frozen" in self.__dict__:
+            bot.exit("%s is frozen." % self.__class__.__name__)
+
+    @property
+    def attrs(self):
+        """a lookup of attribute names to (copies of) attributes bound to the
+        struct, so that setting a value (e.g., with set) changes the struct
+        """
+        return {name: att.bind(self) for name, att in self._fields.items()}
 
     def newAttr(
         self,
@@ -199,9 +431,10 @@ class Struct(object):
         regexp="",
         hide=False,
     ):
-        """add a new attribute, including a name, json key to dump,
-        type, and if required. We don't need a value here. You can
-        also update a current attribute here.
+        """add a new attribute to this instance only, including a name, json
+        key to dump, type, and if required. We don't need a value here. You can
+        also update a current attribute here. Attributes shared by all instances
+        should be declared in the class schema instead.
 
         Parameters
         ==========
@@ -211,8 +444,10 @@ class Struct(object):
         jsonName: the name to serialize to json (not required, will use name)
         omitempty: if true, don't serialize with response.
         regexp: if a string is provided as the type (or nested), check against
+                (a pattern string or compiled regular expression)
         """
-        self.attrs[name] = StructAttr(
+        self._check_frozen()
+        att = StructAttr(
             name=name,
             attType=attType,
             required=required,
@@ -222,15 +457,94 @@ class Struct(object):
             hide=hide,
         )
 
+        # Copy the class lookups the first time this instance is changed
+        if "_fields" not in self.__dict__:
+            self._fields = dict(self._fields)
+
+        if name in self._fields:
+            att.index = self._fields[name].index
+        else:
+            att.index = len(self._values)
+            self._values.append(None)
+
+        self._fields[name] = att
+        self._json_lookup = {att.jsonName: att for att in self._fields.values()}
+        self._nested = _nested_indices(self._fields)
+        self.invalidate()
+
+    def get(self, name):
+        """get the value of an attribute by name"""
+        if name not in self._fields:
+            bot.exit("%s is not a valid attribute." % name)
+        return self._values[self._fields[name].index]
+
+    def _set(self, att, value):
+        """load and validate a value for an attribute. Return true if set"""
+        value = att.loader(value)
+        if att.validator(value):
+            if att.interner:
+                value = att.interner(value)
+            self._values[att.index] = value
+            return True
+        return False
+
     def _clear_values(self):
         """if a load is done, we remove previously loaded values for any
         attributes
         """
-        for name, att in self.attrs.items():
-            self.attrs[name].value = None
+        self._values = [None] * len(self._values)
+
+    def invalidate(self):
+        """clear the cached serialized forms of the struct, and of the structs
+        it is nested in. This is done when a value is changed with add or load,
+        and must be called after changing a value in place (e.g., adding to
+        the Annotations dictionary).
+        """
+        self.__dict__.pop("_cache", None)
+        parents = self.__dict__.pop("_parents", None)
+        if parents:
+            for ref in parents.values():
+                parent = ref()
+                if parent is not None:
+                    parent.invalidate()
+
+    def _cached(self, key, func):
+        """return a serialized form of the struct from the cache, or create it
+        with func and cache it if the struct is valid.
+        """
+        cache = self.__dict__.get("_cache")
+        if cache is not None and key in cache:
+            return cache[key]
+
+        result = func()
+        if result is not None:
+            cache = self.__dict__.get("_cache")
+            if cache is None:
+                cache = self._cache = {}
+                self._watch()
+            cache[key] = result
+        return result
+
+    def _watch(self):
+        """register as the parent of nested structs, so that changing one of
+        them also clears the cache of this struct.
+        """
+        ref = weakref.ref(self)
+        for index in self._nested:
+            value = self._values[index]
+            if not value:
+                continue
+            for child in value if isinstance(value, list) else [value]:
+                child.__dict__.setdefault("_parents", {})[id(self)] = ref
 
     def to_dict(self):
-        """return a Struct as a dictionary, must be valid"""
+        """return a Struct as a dictionary, must be valid. The dictionary is
+        cached until a value changes, so it should not be modified.
+        """
+        return self._cached("dict", self._to_dict)
+
+    def _to_dict(self):
+        """create the dictionary for to_dict"""
         # A lookup of "empty" values based on types (mirrors Go)
         lookup = {str: "", int: None, list: [], dict: {}}
 
@@ -239,54 +553,159 @@ class Struct(object):
 
         if self.validate():
             result = {}
-            for name, att in self.attrs.items():
+            for att in self._fields.values():
+                value = self._values[att.index]
 
                 # Don't show if unset and omit empty, OR marked to hide
-                if (not att.value and att.omitempty) or att.hide:
+                if (not value and att.omitempty) or att.hide:
                     continue
-                if not att.value:
-                    value = lookup.get(att.attType, [])
-                    result[att.jsonName] = value
+                if not value:
+                    empty = isinstance(att.attType, type)
+                    result[att.jsonName] = lookup.get(att.attType, []) if empty else []
                 else:
-                    # If structure or list, call to_dict
-                    if att._is_struct() or isinstance(att.value, list):
-                        result[att.jsonName] = att.to_dict()
-                    else:
-                        result[att.jsonName] = att.value
+                    # If structure or list, the encoder calls to_dict
+                    result[att.jsonName] = att.encoder(value)
 
             return result
 
     def to_json(self):
         """get the dictionary of a struct and return pretty printed json"""
+        return self._cached("json", self._to_json)
+
+    def _to_json(self):
         result = self.to_dict()
         if result:
             result = json.dumps(result, indent=4)
         return result
 
+    def to_canonical_bytes(self):
+        """get the dictionary of a struct and return compact, canonical json
+        bytes. Keys are sorted and there is no whitespace, so the same content
+        always has the same bytes (and digest).
+        """
+        return self._cached("canonical", self._to_canonical_bytes)
+
+    def _to_canonical_bytes(self):
+        result = self.to_dict()
+        if result is not None:
+            result = canonicalEncoder.encode(result).encode("utf-8")
+        return result
+
+    def descriptor(self, content=None, mediatype=None, algorithm=None):
+        """return a Descriptor (digest, size and mediaType) for the canonical
+        json bytes of a struct. To also use the bytes (e.g., to push them)
+        get them from to_canonical_bytes and provide them as content, so
+        the struct is only encoded once.
+
+        Parameters
+        ==========
+        content: the canonical json bytes, if already encoded
+        mediatype: the media type, if the struct doesn't define one
+        algorithm: the digest algorithm, defaults to Canonical (sha256)
+        """
+        from opencontainers.digest import Canonical
+        from opencontainers.image.v1.descriptor import Descriptor
+
+        mediatype = mediatype or self.mediaType
+        if not mediatype:
+            bot.exit("%s does not have a mediaType." % self.__class__.__name__)
+
+        if content is None:
+            content = self.to_canonical_bytes()
+            digest = self.canonical_digest(algorithm)
+        else:
+            digest = (algorithm or Canonical).fromBytes(content)
+        if content is None:
+            bot.exit("%s is invalid" % self)
+
+        return Descriptor(digest=digest, size=len(content), mediatype=mediatype)
+
+    def canonical_digest(self, algorithm=None):
+        """return the digest of the canonical json bytes of a struct, which is
+        cached until a value changes (and then, for a frozen struct, never
+        computed again). Return None if the struct is invalid.
+
+        Parameters
+        ==========
+        algorithm: the digest algorithm, defaults to Canonical (sha256)
+        """
+        from opencontainers.digest import Canonical
+
+        algorithm = algorithm or Canonical
+        return self._cached(
+            "canonical_digest:%s" % algorithm, lambda: self._canonical_digest(algorithm)
+        )
+
+    def _canonical_digest(self, algorithm):
+        content = self.to_canonical_bytes()
+        if content is not None:
+            return algorithm.fromBytes(content)
+
     def add(self, name, value):
         """add a value to an existing attribute, normally when used by a client"""
-        if name not in self.attrs:
+        if name not in self._fields:
             bot.exit("%s is not a valid attribute." % name)
+        self._check_frozen()
 
-        attr = self.attrs[name]
+        attr = self._fields[name]
 
         # Don't validate the type if provided is empty
         if value:
-            if not attr.set(value):
+            if not self._set(attr, value):
                 bot.exit("%s must be type %s." % (name, attr.attType))
+            self.invalidate()
+
+    def with_changes(self, **fields):
+        """return a new struct with the values of some attributes (by name)
+        changed, e.g., with_changes(Annotations={...}). The values are
+        validated as for add, and a value of None unsets an attribute. The
+        other values, including nested structs, are shared with this struct
+        and not copied, so don't change them in place (derive them with
+        with_changes too).
+        """
+        new = self.__class__.__new__(self.__class__)
+        new._values = list(self._values)
 
-    def load(self, content, validate=True):
+        # Attributes added to this instance are copied, as for newAttr
+        if "_fields" in self.__dict__:
+            new._fields = dict(self._fields)
+            new._json_lookup = self._json_lookup
+            new._nested = self._nested
+
+        for name, value in fields.items():
+            att = new._fields.get(name)
+            if not att:
+                bot.exit("%s is not a valid attribute." % name)
+            if value is None:
+                new._values[att.index] = None
+            elif not new._set(att, value):
+                bot.exit("%s must be type %s." % (name, att.attType))
+        return new
+
+    def load(self, content, validate=True, trust=False, lazy=False):
         """given a dictionary load into its respective object
         if validate is True, we require it to be completely valid.
+
+        If trust is True the content is known to be valid (e.g., it was
+        verified against a digest, or written by this library) and values
+        are stored without checking types, regular expressions or required
+        attributes, for nested structs too. Call validate to check it later.
+        If lazy is True the content is trusted, and lists of nested structs
+        (e.g., the manifests of an Index) keep the dictionaries and only
+        build a struct when it is accessed (see LazyList).
         """
         # import code
         # code.interact(local=locals())
 
         if not isinstance(content, dict):
             bot.exit("Please provide a dictionary or list to load.")
+        self._check_frozen()
 
         # Look up attributes based on jsonKey
-        lookup = self.generate_json_lookup()
+        lookup = self._json_lookup
+
+        if trust or lazy:
+            return self._load_trusted(content, lookup, lazy)
 
         for key, value in content.items():
             att = lookup.get(key)
@@ -295,10 +714,11 @@ class Struct(object):
 
         # If we get here, all parameters are valid, replace
         self._clear_values()
+        self.invalidate()
 
         for key, value in content.items():
             att = lookup.get(key)
-            valid = att.set(value)
+            valid = self._set(att, value)
             if not valid and validate:
                 bot.exit("%s (%s) is not valid." % (att.name, att.jsonName))
 
@@ -308,14 +728,59 @@ class Struct(object):
                 bot.exit("%s is invalid" % self)
         return self
 
+    def _load_trusted(self, content, lookup, lazy=False):
+        """load trusted content, only checking that the attributes exist"""
+        values = [None] * len(self._values)
+        for key, value in content.items():
+            att = lookup.get(key)
+            if not att:
+                bot.exit("%s is not a valid json attribute." % key)
+            value = att.loader(value, True, lazy)
+            if att.interner:
+                value = att.interner(value)
+            values[att.index] = value
+
+        self._values = values
+        self.invalidate()
+        return self
+
+    @classmethod
+    def iter_from_stream(
+        cls, stream, name, validate=True, trust=False, chunk_size=65536
+    ):
+        """yield the items of a list attribute (e.g., the Manifests of an
+        Index, or the Repositories of a RepositoryList) from a json stream,
+        without loading the whole document. Nested structs are loaded (and
+        validated) one at a time. See opencontainers.stream.iter_json_array
+        for the streams supported.
+        """
+        from opencontainers.stream import iter_json_array
+
+        att = cls._fields.get(name)
+        if not att or not isinstance(att.attType, list):
+            bot.exit("%s is not a valid list attribute." % name)
+
+        for item in iter_json_array(stream, att.jsonName, chunk_size):
+            value = att.load([item], trust=trust)
+            if validate and not trust and not att.is_valid(value):
+                bot.exit("%s (%s) is not valid." % (att.name, att.jsonName))
+            yield value[0]
+
+    @classmethod
+    def validate_many(cls, documents, workers=None, chunksize=64):
+        """validate many documents (dictionaries or json text) against this
+        struct, returning a ValidationReport with every error found instead
+        of exiting on the first one. See opencontainers.validation.
+        """
+        from opencontainers.validation import validate_many
+
+        return validate_many(cls, documents, workers, chunksize)
+
     def generate_json_lookup(self):
         """based on the attributes, generate a jsonName lookup object.
         keys are jsonNames we find in the wild, names are attribute names.
         """
-        lookup = dict()
-        for name, att in self.attrs.items():
-            lookup[att.jsonName] = att
-        return lookup
+        return dict(self._json_lookup)
 
     def validate(self):
         """validate goes through each attribute, and ensure that it is of the
@@ -323,19 +788,20 @@ class Struct(object):
         to some extent when load is called, but this function serves as
         a final validation (after an initial config is loaded).
         """
-        for name, att in self.attrs.items():
+        for name, att in self._fields.items():
+            value = self._values[att.index]
 
             # Not required, undefined
-            if not att.required and not att.value:
+            if not att.required and not value:
                 continue
 
             # A required attribute cannot be None or empty
-            if att.required and not att.value:
+            if att.required and not value:
                 bot.error("%s is required." % name)
                 return False
 
             # The attribute must match its type
-            if not att.validate_type(att.value):
+            if not att.type_validator(value):
                 bot.error("%s should be type %s" % (name, att.attType))
                 return False
 
@@ -346,6 +812,190 @@ class Struct(object):
         return True
 
 
+def reuse_struct(struct):
+    """return a struct that is already loaded, to be nested in another, or
+    exit if it isn't valid. Frozen structs were validated when frozen.
+    """
+    if "_frozen" not in struct.__dict__ and not struct.validate():
+        bot.exit("%s is invalid." % struct.__class__.__name__)
+    return struct
+
+
+def _restore(cls, values):
+    """create a struct holding (already valid) values, when unpickled"""
+    self = cls.__new__(cls)
+    self._values = values
+    return self
+
+
+def _freeze(value):
+    """return a value of a struct that is being frozen, frozen too"""
+    if isinstance(value, Struct):
+        return value if isinstance(value, (str, int)) else value.freeze()
+    if isinstance(value, list):
+        return FrozenList(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return FrozenDict(value)
+    return value
+
+
+def _nested_indices(fields):
+    """return the indices of attributes holding structs (or lists of them) that
+    can change, meaning not a StrStruct or IntStruct.
+    """
+    indices = []
+    for att in fields.values():
+        attType = att.attType
+        if isinstance(attType, list):
+            attType = attType[0] if attType else None
+        if (
+            isinstance(attType, type)
+            and issubclass(attType, Struct)
+            and not issubclass(attType, (str, int))
+        ):
+            indices.append(att.index)
+    return tuple(indices)
+
+
+class LazyList(list):
+    """a list of nested structs loaded from trusted content, which holds the
+    dictionaries and builds (and keeps) the struct for an item the first time
+    it is accessed. Indexing, iteration and len don't build the other items,
+    and any other list function builds all of them first.
+    """
+
+    def __init__(self, structType, items=()):
+        super().__init__(items)
+        self.structType = structType
+
+    def _build(self, index):
+        item = list.__getitem__(self, index)
+        if isinstance(item, dict):
+            item = self.structType.from_dict(item, trust=True, lazy=True)
+            list.__setitem__(self, index, item)
+        return item
+
+    def materialize(self):
+        """build the struct for every item that hasn't been accessed yet"""
+        for index in range(len(self)):
+            self._build(index)
+        return self
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build(i) for i in range(*index.indices(len(self)))]
+        return self._build(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._build(index)
+
+    def __reversed__(self):
+        for index in reversed(range(len(self))):
+            yield self._build(index)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyList):
+            other.materialize()
+        return list.__eq__(self.materialize(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        # Items that weren't accessed are pickled as dictionaries
+        return (self.__class__, (self.structType, list(list.__iter__(self))))
+
+
+def _materializing(name):
+    """return a list function that first builds all items of a LazyList"""
+    function = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        return function(self.materialize(), *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in [
+    "__add__",
+    "__contains__",
+    "__mul__",
+    "__repr__",
+    "__rmul__",
+    "copy",
+    "count",
+    "index",
+    "pop",
+    "remove",
+    "sort",
+]:
+    setattr(LazyList, _name, _materializing(_name))
+
+
+def _frozen(name):
+    """return a function that exits, for a function that changes a value"""
+
+    def wrapper(self, *args, **kwargs):
+        bot.exit("%s is frozen, %s is not allowed." % (self.__class__.__name__, name))
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+class FrozenList(list):
+    """a list of a frozen struct, which can't be changed"""
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+for _name in [
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "__setitem__",
+    "append",
+    "clear",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "reverse",
+    "sort",
+]:
+    setattr(FrozenList, _name, _frozen(_name))
+
+
+class FrozenDict(dict):
+    """a dictionary of a frozen struct (e.g., annotations), which can't be
+    changed
+    """
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+for _name in [
+    "__delitem__",
+    "__ior__",
+    "__setitem__",
+    "clear",
+    "pop",
+    "popitem",
+    "setdefault",
+    "update",
+]:
+    setattr(FrozenDict, _name, _frozen(_name))
+
+
+# canonicalEncoder writes compact json with sorted keys
+canonicalEncoder = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=False
+)
+
+
 class StrStruct(Struct, str):
     """a string Struct provides (generally) the same functions, but isn't
     tied to attributes but rather a single string value.
@@ -355,13 +1005,21 @@ class StrStruct(Struct, str):
         self.value = value or ""
         super().__init__(**kwargs)
 
-    def load(self, content, validate=True):
+    def load(self, content, validate=True, trust=False):
         # If we have a string, self must also have string subclass
         if isinstance(self, str) and isinstance(content, str):
             self = self.__class__(content)
-            self.validate()
+            if not trust:
+                self.validate()
             return self
 
+    def __reduce__(self):
+        return (self.__class__, (str.__str__(self),))
+
+    # Compare (and hash) as the string, not as a struct
+    __eq__ = str.__eq__
+    __hash__ = str.__hash__
+
 
 class IntStruct(Struct, int):
     """a string Struct provides (generally) the same functions, but isn't
@@ -372,9 +1030,17 @@ class IntStruct(Struct, int):
         self.value = value or ""
         super().__init__(**kwargs)
 
-    def load(self, content, validate=True):
+    def load(self, content, validate=True, trust=False):
         # If we have an int, self must also have string subclass
         if isinstance(self, int) and isinstance(content, int):
             self = self.__class__(content)
-            self.validate()
+            if not trust:
+                self.validate()
             return self
+
+    def __reduce__(self):
+        return (self.__class__, (int(self),))
+
+    # Compare (and hash) as the int, not as a struct
+    __eq__ = int.__eq__
+    __hash__ = int.__hash__
@@ -37,3 +37,145 @@ def test_algorithms(tmp_path):
         readerDgst = alg.fromReader(newReader)
 
         assert alg.fromBytes(p) == readerDgst == alg.fromString(asciitext)
+
+
+def test_algorithms_from_file(tmp_path, monkeypatch):
+    """test digesting files and readers in chunks"""
+    import hashlib
+
+    p = os.urandom(3 * 1024 + 17)
+    path = tmp_path / "blob"
+    path.write_bytes(p)
+
+    class Reader:
+        """a reader without readinto, like some socket files"""
+
+        def __init__(self, content):
+            self.content = io.BytesIO(content)
+
+        def read(self, size=-1):
+            return self.content.read(size)
+
+    for name, alg in algorithms.items():
+        expected = alg.fromBytes(p)
+        assert alg.fromFile(path) == expected
+        assert alg.fromReader(Reader(p), bufferSize=100) == expected
+        with open(path, "rb") as fd:
+            assert alg.fromReader(fd) == expected
+
+    # Readers are digested from their position, and left at their end
+    sha256 = algorithms["sha256"]
+    reader = io.BytesIO(b"header" + p)
+    reader.read(6)
+    assert sha256.fromReader(reader, bufferSize=100) == sha256.fromBytes(p)
+    assert reader.read() == b""
+    with open(path, "rb") as fd:
+        fd.read(17)
+        assert sha256.fromReader(fd) == sha256.fromBytes(p[17:])
+        assert fd.read() == b""
+
+    # Without hashlib.file_digest, files are read into a reusable buffer
+    monkeypatch.delattr(hashlib, "file_digest", raising=False)
+    for name, alg in algorithms.items():
+        assert alg.fromFile(path, bufferSize=100) == alg.fromBytes(p)
+        assert alg.fromReader(io.BytesIO(p), bufferSize=100) == alg.fromBytes(p)
+
+    with pytest.raises(SystemExit):
+        algorithms["sha256"].fromReader(p)
+
+
+def test_algorithms_multi_digester(tmp_path):
+    """test digesting content with several algorithms in one pass"""
+    from opencontainers.digest import MultiDigester
+
+    p = os.urandom(1024 * 1024 + 17)
+    path = tmp_path / "blob"
+    path.write_bytes(p)
+    expected = {name: alg.fromBytes(p) for name, alg in algorithms.items()}
+
+    for threads in [False, True]:
+        with MultiDigester(threads=threads) as digester:
+            view = memoryview(p)
+            for start in range(0, len(p), 65536):
+                digester.write(view[start : start + 65536])
+            assert digester.digests() == expected
+
+        with MultiDigester(["sha256", "sha512"], threads=threads) as digester:
+            digester.writeFile(path, mapped=threads)
+            digests = digester.digests()
+            assert list(digests) == ["sha256", "sha512"]
+            assert digests["sha512"] == expected["sha512"]
+
+    digester = MultiDigester(["sha384"])
+    reader = io.BytesIO(b"header" + p)
+    reader.read(6)
+    digester.readFrom(reader, bufferSize=1000)
+    assert digester.digests() == {"sha384": expected["sha384"]}
+
+    with pytest.raises(SystemExit):
+        MultiDigester(["sha256", "bean"])
+
+
+def test_algorithms_register(tmp_path):
+    """test that registered algorithms work through digests and verifiers"""
+    import hashlib
+    from opencontainers.digest import (
+        CompactDigest,
+        DigestSet,
+        MultiDigester,
+        Parse,
+        RegisterAlgorithm,
+    )
+    from opencontainers.digest import algorithm as module
+
+    tables = [
+        module.algorithms,
+        module.factories,
+        module.digestSizes,
+        module.algorithmEncodings,
+        module.encodedSizes,
+        module.anchoredEncodedRegexps,
+    ]
+    saved = [dict(table) for table in tables]
+    try:
+        blake2b = RegisterAlgorithm("blake2b", hashlib.blake2b)
+        blake2s = RegisterAlgorithm("b2s", hashlib.blake2s, encoding="base64url")
+        p = os.urandom(1000)
+
+        digest = blake2b.fromBytes(p)
+        assert digest == "blake2b:" + hashlib.blake2b(p).hexdigest()
+        assert Parse(digest).validate()
+        assert Algorithm("blake2b").available() and blake2b.size() == 64
+
+        digest = blake2s.fromBytes(p)
+        assert len(digest.encoded()) == 43
+        assert Parse(digest).validate()
+        with pytest.raises(ErrDigestInvalidLength):
+            Parse(digest[:-1])
+        with pytest.raises(ErrDigestInvalidFormat):
+            Parse(digest[:-1] + "+")
+
+        verifier = digest.verifier()
+        verifier.write(p)
+        assert verifier.verified()
+
+        with MultiDigester(["sha256", "blake2b", "b2s"]) as digester:
+            digester.write(p)
+            digests = digester.digests()
+            assert digests["b2s"] == digest
+            assert digests["blake2b"] == blake2b.fromBytes(p)
+
+        compact = digest.compact()
+        assert len(compact.raw) == 32 and compact.toDigest() == digest
+        assert DigestSet([digest, digests["blake2b"]]).lookup("b2s:" + digest[4:10])
+
+        for name in ["blake2b-256", "Blake", ""]:
+            with pytest.raises(SystemExit):
+                RegisterAlgorithm(name, hashlib.blake2b)
+        with pytest.raises(SystemExit):
+            RegisterAlgorithm("blake2b", hashlib.blake2b, encoding="base32")
+    finally:
+        for table, values in zip(tables, saved):
+            table.clear()
+            table.update(values)
+    assert not Algorithm("blake2b").available()
@@ -176,3 +176,36 @@ def test_example_config(tmp_path):
     # minimum valid required
     image.load(config_valid_required)
     assert image.validate()
+
+
+def test_created_timestamps(tmp_path):
+    """test that Created times are parsed once, with nanoseconds"""
+    from opencontainers.timestamp import Timestamp, parse_timestamp
+
+    image = Image()
+    image.load(config_valid_with_optional)
+    created = image.get("Created")
+    assert isinstance(created, Timestamp)
+    assert created == "2015-10-31T22:22:56.015925234Z"
+    assert created.datetime.microsecond == 15925
+    assert created.ns % 10**9 == 15925234
+    assert image.to_dict()["created"] == "2015-10-31T22:22:56.015925234Z"
+
+    # History can be sorted without parsing again
+    history = image.get("History")
+    ordered = sorted(history, key=lambda h: h.get("Created"))
+    assert ordered[0].get("Created") == "2015-10-31T22:22:54.690851953Z"
+    assert ordered[0].get("Created") < ordered[-1].get("Created")
+
+    # Offsets are taken into account, and other dates are still generous
+    offset = parse_timestamp("2015-10-31T23:22:56+01:00")
+    assert offset.ns == parse_timestamp("2015-10-31T22:22:56Z").ns
+
+    # Ordering is by instant (against strings too), equality by text
+    utc = parse_timestamp("2015-10-31T22:22:56Z")
+    assert offset != utc and hash(offset) == hash(str(offset))
+    assert not offset < utc and not utc < offset and offset <= utc
+    assert offset < "2015-10-31T22:22:57Z" and "2015-10-31T22:00:00Z" < offset
+    assert parse_timestamp("2015-10-31") is None
+    assert image._fields["Created"].validate_datetime("2015-10-31")
+    assert not image._fields["Created"].validate_datetime("2015-13-31T00:00:00Z")
@@ -0,0 +1,82 @@
+#!/usr/bin/python
+
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.image.v1 import Image, Index, Manifest
+from opencontainers.image.v1.corpus import detect, main, scan
+from .test_manifest import valid_with_optional
+from .test_struct import valid_descriptor
+import copy
+import json
+import os
+
+
+def test_corpus(tmp_path, capsys):
+    """test scanning a directory of manifests, indexes and image configs"""
+    config = {
+        "architecture": "amd64",
+        "os": "linux",
+        "rootfs": {"type": "layers", "diff_ids": [valid_descriptor["digest"]]},
+    }
+    index = {
+        "schemaVersion": 2,
+        "mediaType": "application/vnd.oci.image.index.v1+json",
+        "manifests": [valid_descriptor],
+    }
+    invalid = copy.deepcopy(valid_with_optional)
+    invalid["layers"][1]["digest"] = "sha256:abc"
+
+    assert detect(valid_with_optional) is Manifest
+    assert detect(index) is Index
+    assert detect(config) is Image
+    assert detect({"mediaType": "application/json"}) is None
+
+    documents = {
+        "a/manifest.json": valid_with_optional,
+        "a/index.json": index,
+        "b/config.json": config,
+        "b/invalid.json": invalid,
+        "b/unknown.json": {"name": "unknown"},
+    }
+    for name, content in documents.items():
+        path = tmp_path / name
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(json.dumps(content))
+    (tmp_path / "b" / "broken.json").write_text("{")
+    (tmp_path / "b" / "notes.txt").write_text("not json")
+
+    results = list(scan([str(tmp_path)]))
+    assert [os.path.relpath(result["path"], tmp_path) for result in results] == [
+        "a/index.json",
+        "a/manifest.json",
+        "b/broken.json",
+        "b/config.json",
+        "b/invalid.json",
+        "b/unknown.json",
+    ]
+    assert [result["valid"] for result in results] == [
+        True,
+        True,
+        False,
+        True,
+        False,
+        False,
+    ]
+    assert results[4]["mediaType"] == Manifest.mediaType
+    assert results[4]["errors"] == [
+        {"path": "layers[1].digest", "message": "invalid checksum digest length"}
+    ]
+
+    # A process pool gives the same results, in order
+    assert list(scan([str(tmp_path)], workers=2, chunksize=2)) == results
+
+    # The command line writes ndjson and fails for invalid documents
+    assert main([str(tmp_path), "--workers", "1", "--invalid-only"]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        result for result in results if not result["valid"]
+    ]
@@ -6,7 +6,7 @@
 # Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-from opencontainers.digest import Parse, NewDigestFromEncoded
+from opencontainers.digest import Parse, NewDigestFromEncoded, DigestRegexpAnchored
 
 from opencontainers.digest.exceptions import (
     ErrDigestInvalidLength,
@@ -16,7 +16,6 @@ from opencontainers.digest.exceptions import (
 import os
 import pytest
 
-
 digests = [
     {
         "input": "sha256:e58fcf7418d4390dec8e8fb69d88c06ec07039d651fedd3aa72af9972e7d046b",
@@ -106,6 +105,7 @@ def test_digests(tmp_path):
         else:
 
             d = Parse(digest["input"])
+            assert DigestRegexpAnchored.search(d)
 
             # These are cases we can parse, but don't have support for algorithm
             if "err" in digest:
@@ -120,3 +120,59 @@ def test_digests(tmp_path):
                     digest["algorithm"], digest["encoded"]
                 )
                 assert newFromEncoded == d
+
+
+def test_digests_cached(tmp_path):
+    """test that valid digests are cached, and invalid ones still raise"""
+    from opencontainers.digest import digest as module
+    from opencontainers.digest import EnableParseCache, DisableParseCache
+
+    EnableParseCache(maxsize=16)
+    try:
+        test_digests(tmp_path)
+        d = Parse(digests[0]["input"])
+        assert Parse(digests[0]["input"]) is d
+        assert d.validate()
+        hits = module.parseCache.cache_info().hits
+        assert NewDigestFromEncoded("sha256", digests[0]["encoded"]).validate()
+        assert module.parseCache.cache_info().hits == hits + 1
+        with pytest.raises(ErrDigestInvalidLength):
+            NewDigestFromEncoded("sha256", "abcdef0123456789").validate()
+    finally:
+        DisableParseCache()
+    assert module.parseCache is None
+
+
+def test_digests_compact(tmp_path):
+    """test converting digests to and from CompactDigest"""
+    from opencontainers.digest import CompactDigest, FromBytes, SHA512
+    import pickle
+
+    for digest in digests:
+        if "err" in digest and "algorithm" not in digest:
+            with pytest.raises(digest["err"]):
+                CompactDigest.fromDigest(digest["input"])
+            continue
+
+        # Algorithms with an extra component (e.g., sha384.foo+bar) are kept
+        d = Parse(digest["input"])
+        compact = d.compact()
+        assert len(compact.raw) == d.algorithm.size()
+        assert compact.toDigest() == d
+        assert str(compact) == d
+        assert compact.algorithm == d.algorithm
+        assert compact.encoded() == digest["encoded"]
+        assert pickle.loads(pickle.dumps(compact)) == compact
+    with pytest.raises(digest_unsupported["err"]):
+        CompactDigest.fromDigest(digest_unsupported["input"])
+    extended = Parse("sha256+ext:%s" % FromBytes(b"a").encoded()).compact()
+    assert extended != FromBytes(b"a").compact()
+    assert extended.raw == FromBytes(b"a").compact().raw
+
+    a, b = FromBytes(b"a").compact(), FromBytes(b"b").compact()
+    assert a == FromBytes(b"a").compact() and a != b
+    assert len({a, b, FromBytes(b"a").compact()}) == 2
+    assert sorted([b, a]) == sorted([a, b])
+    assert SHA512.fromBytes(b"a").compact() != a
+    with pytest.raises(AttributeError):
+        a.value = "sha256:abc"
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.digest import (
+    DigestSet,
+    NewSet,
+    ShortCodeTable,
+    FromBytes,
+    NewDigestFromEncoded,
+)
+from opencontainers.digest.exceptions import (
+    ErrDigestNotFound,
+    ErrDigestAmbiguous,
+    ErrDigestInvalidLength,
+)
+import os
+import pytest
+
+
+def test_digestset_lookup(tmp_path):
+    """test looking up digests by short identifiers"""
+    digests = [
+        NewDigestFromEncoded(
+            "sha256", "1234511111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "1234111111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "1234611111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "5432111111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "6543111111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "6432111111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "6542111111111111111111111111111111111111111111111111111111111111"
+        ),
+        NewDigestFromEncoded(
+            "sha256", "6532111111111111111111111111111111111111111111111111111111111111"
+        ),
+    ]
+    dset = NewSet()
+    with pytest.raises(ErrDigestNotFound):
+        dset.lookup("54")
+    for digest in digests:
+        dset.add(digest)
+    assert len(dset) == len(digests)
+
+    assert dset.lookup("54") == digests[3]
+    assert dset.lookup("sha256:54") == digests[3]
+    assert dset.lookup("12345") == digests[0]
+    assert dset.lookup("12346") == digests[2]
+    assert dset.lookup("12341") == digests[1]
+    assert dset.lookup(str(digests[0])) == digests[0]
+    for short in ["1234", "12", "65", "sha256:1234"]:
+        with pytest.raises(ErrDigestAmbiguous):
+            dset.lookup(short)
+    for short in ["9", "sha384:12345", "sha256:", ""]:
+        with pytest.raises(ErrDigestNotFound):
+            dset.lookup(short)
+
+    # The same encoded value with another algorithm needs the algorithm
+    other = NewDigestFromEncoded("sha512", digests[3].encoded() * 2)
+    dset.add(other)
+    assert dset.lookup("sha512:54") == other
+    with pytest.raises(ErrDigestAmbiguous):
+        dset.lookup("54")
+    assert dset.lookup("sha256:54") == digests[3]
+    assert dset.lookup(digests[3].encoded()) == digests[3]
+
+    dset.remove(other)
+    dset.remove(digests[0])
+    dset.remove(digests[2])
+    assert digests[0] not in dset and digests[1] in dset
+    assert dset.lookup("1234") == digests[1]
+    remaining = [digests[1]] + digests[3:]
+    assert dset.all() == sorted(remaining, key=lambda digest: digest.encoded())
+
+    with pytest.raises(ErrDigestInvalidLength):
+        dset.add("sha256:1234")
+
+
+def test_digestset_short_codes(tmp_path):
+    """test that short codes are unique, and resolve to their digest"""
+    digests = [FromBytes(os.urandom(8)) for _ in range(2000)]
+    dset = DigestSet(digests + digests[:100])
+    assert len(dset) == 2000
+    assert list(dset) == dset.all()
+
+    table = ShortCodeTable(dset, 2)
+    assert len(set(table.values())) == 2000
+    for digest, short in table.items():
+        assert len(short) >= 2
+        assert dset.lookup(short) == digest
+        assert short == dset.shortest(digest, 2)
+        if len(short) > 2:
+            with pytest.raises(ErrDigestAmbiguous):
+                dset.lookup(short[:-1])
+
+    # A longer minimum length is used when it is unique
+    assert len(dset.shortest(digests[0], 12)) == 12
+    with pytest.raises(ErrDigestNotFound):
+        dset.shortest(FromBytes(b"missing"))
@@ -0,0 +1,506 @@
+#!/usr/bin/python
+
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.struct import Struct, StructAttr
+from opencontainers.image.v1 import Descriptor, Platform
+import copy
+import json
+import pytest
+
+valid_descriptor = {
+    "mediaType": "application/vnd.oci.image.manifest.v1+json",
+    "size": 7682,
+    "digest": "sha256:5b0bcabd1ed22e9fb1310cf6c2dec7cdef19f0ad69efa1f392e94a4333501270",
+    "platform": {"architecture": "amd64", "os": "linux"},
+}
+
+
+@pytest.fixture
+def compiled():
+    """restore the functions that compile installs on struct classes, so
+    the other tests cover the generic load and to_dict
+    """
+    names = ["_compiled", "_source", "load", "from_dict", "_to_dict"]
+    classes, saved = [Struct], {}
+    for cls in classes:
+        classes += cls.__subclasses__()
+        saved[cls] = {
+            name: cls.__dict__[name] for name in names if name in cls.__dict__
+        }
+    yield
+    for cls, attributes in saved.items():
+        for name in names:
+            if name in attributes:
+                setattr(cls, name, attributes[name])
+            elif name in cls.__dict__:
+                delattr(cls, name)
+
+
+def test_struct_schema(tmp_path):
+    """test that attributes are declared once per class, not per instance"""
+    first = Descriptor().load(valid_descriptor)
+    second = Descriptor()
+
+    # The attribute definitions are shared, the values are not
+    assert first._fields is second._fields is Descriptor._fields
+    assert first.get("Size") == 7682
+    assert second.get("Size") is None
+    assert isinstance(first.get("Platform"), Platform)
+    assert first.attrs["Size"].value == 7682
+    assert first.to_dict() == valid_descriptor
+
+    # The attributes of attrs are bound to the struct, and set its values
+    size = first.attrs["Size"]
+    assert size.to_dict() == 7682
+    assert size.set(42) and first.get("Size") == 42
+    assert not size.set("large") and first.get("Size") == 42
+    first.attrs["Size"].value = 7682
+    assert first.to_dict() == valid_descriptor
+    assert first.attrs["Platform"].to_dict() == valid_descriptor["platform"]
+    assert Descriptor._fields["Size"].value is None
+
+    # A duplicate attribute name is an error when the class is created
+    with pytest.raises(ValueError):
+
+        class Duplicate(Struct):
+            schema = [StructAttr("Name", str), StructAttr("Name", int)]
+
+    # newAttr only changes the instance it is called on
+    second.newAttr(name="Extra", attType=str, jsonName="extra")
+    second.add("Extra", "value")
+    assert second.get("Extra") == "value"
+    assert "Extra" not in Descriptor._fields
+    with pytest.raises(SystemExit):
+        first.add("Extra", "value")
+
+
+def test_struct_compile(tmp_path, compiled):
+    """test that generated load and to_dict functions match the generic ones"""
+    from opencontainers.image.v1 import Manifest
+    from .test_manifest import valid_with_optional, invalid_config_size_string
+
+    expected = Struct.to_dict(Struct.load(Manifest(), valid_with_optional))
+    Manifest.compile()
+    assert "_compiled" in Descriptor.__dict__
+    assert Manifest.load is not Struct.load
+
+    manifest = Manifest.from_dict(valid_with_optional)
+    assert manifest.to_dict() == expected
+    assert Manifest().load(valid_with_optional).to_dict() == expected
+
+    # Invalid content still exits on load
+    with pytest.raises(SystemExit):
+        Manifest.from_dict(invalid_config_size_string)
+    with pytest.raises(SystemExit):
+        Manifest.from_dict({"schemaVersion": 2, "unknown": True})
+    with pytest.raises(SystemExit):
+        manifest.with_changes(Config=Descriptor())
+
+    # Trusted content is checked when it is serialized, as for Struct.to_dict
+    invalid = dict(valid_descriptor, size="big")
+    descriptor = Descriptor.from_dict(invalid, trust=True)
+    assert descriptor.to_dict() is None
+    assert Struct._to_dict(descriptor) is None
+
+    # Subclasses inherit the generated functions, and load as Struct does
+    class SubManifest(Manifest):
+        pass
+
+    for trust in (False, True):
+        manifest = SubManifest.from_dict(valid_with_optional, trust=trust)
+        assert isinstance(manifest, SubManifest)
+        assert manifest.to_dict() == expected
+    manifest = SubManifest.from_dict(valid_with_optional, lazy=True)
+    assert manifest.to_dict() == expected
+
+
+def test_struct_regexp(tmp_path):
+    """test that regular expressions are compiled once and shared"""
+    from opencontainers.regexp import compile_regexp, MediaTypeRegexp
+
+    assert Descriptor._fields["MediaType"].regexp is MediaTypeRegexp
+    assert compile_regexp(MediaTypeRegexp.pattern) is MediaTypeRegexp
+
+    # A pattern string is compiled on the attribute
+    att = StructAttr(name="Name", attType=str, regexp="^[a-z]+$")
+    assert att.regexp is compile_regexp("^[a-z]+$")
+    assert att.validate_regexp(["abc", "def"])
+    assert not att.validate_regexp("ABC")
+
+
+def test_struct_canonical(tmp_path):
+    """test canonical json bytes and the descriptor for them"""
+    from opencontainers.image.v1 import Manifest, MediaTypeImageManifest
+    from .test_manifest import valid_with_optional
+    import hashlib
+    import json
+
+    manifest = Manifest().load(valid_with_optional)
+    content = manifest.to_canonical_bytes()
+    assert content == json.dumps(
+        valid_with_optional, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+    desc = manifest.descriptor(content)
+    assert desc.get("Digest") == "sha256:%s" % hashlib.sha256(content).hexdigest()
+    assert desc.get("Size") == len(content)
+    assert desc.get("MediaType") == MediaTypeImageManifest
+    assert manifest.descriptor().to_dict() == desc.to_dict()
+
+    # A struct without a media type needs one
+    with pytest.raises(SystemExit):
+        Platform(arch="amd64", platform_os="linux").descriptor()
+
+
+def test_struct_cache(tmp_path):
+    """test that serialized structs are cached until a value changes"""
+    from opencontainers.image.v1 import Index
+    from .test_imageindex import index_with_optional
+
+    index = Index().load(copy.deepcopy(index_with_optional))
+    first = index.to_dict()
+    content = index.to_canonical_bytes()
+    assert index.to_dict() is first
+    assert index.to_canonical_bytes() is content
+
+    # Changing a nested struct clears the cache of its parents
+    platform = index.get("Manifests")[0].get("Platform")
+    platform.add("Variant", "v8")
+    assert index.to_dict() is not first
+    assert index.to_dict()["manifests"][0]["platform"]["variant"] == "v8"
+    assert index.to_canonical_bytes() != content
+
+    # Values changed in place need an explicit invalidate
+    content = index.to_canonical_bytes()
+    index.get("Annotations")["key"] = "value"
+    assert index.to_canonical_bytes() is content
+    index.invalidate()
+    assert b'"key":"value"' in index.to_canonical_bytes()
+
+
+def test_struct_trusted(tmp_path):
+    """test loading trusted content without validation"""
+    from opencontainers.image.v1 import Manifest
+    from opencontainers.digest import Digest
+    from opencontainers.digest.exceptions import ErrDigestInvalidLength
+    from .test_manifest import valid_with_optional
+
+    manifest = Manifest.from_dict(valid_with_optional, trust=True)
+    assert manifest.to_dict() == Manifest.from_dict(valid_with_optional).to_dict()
+    assert isinstance(manifest.get("Config"), Descriptor)
+    assert isinstance(manifest.get("Config").get("Digest"), Digest)
+
+    # Invalid content is only caught when validated on demand
+    invalid = copy.deepcopy(valid_descriptor)
+    invalid["digest"] = "sha256:5b0bcabd"
+    descriptor = Descriptor.from_dict(invalid, trust=True)
+    assert descriptor.get("Digest") == "sha256:5b0bcabd"
+    with pytest.raises(ErrDigestInvalidLength):
+        Descriptor.from_dict(invalid)
+    with pytest.raises(ErrDigestInvalidLength):
+        descriptor.get("Digest").validate()
+
+    # Unknown attributes are still an error
+    with pytest.raises(SystemExit):
+        Descriptor.from_dict({"unknown": 1}, trust=True)
+
+
+def test_struct_lazy(tmp_path):
+    """test that lazy lists of nested structs are built when accessed"""
+    from opencontainers.image.v1 import Index
+    from opencontainers.struct import LazyList
+    from .test_imageindex import index_with_optional
+
+    expected = Index.from_dict(index_with_optional).to_dict()
+    index = Index.from_dict(index_with_optional, lazy=True)
+    manifests = index.get("Manifests")
+    assert isinstance(manifests, LazyList)
+    assert len(manifests) == 2
+
+    # Only the accessed item is built
+    assert isinstance(manifests[1], Descriptor)
+    assert isinstance(list.__getitem__(manifests, 0), dict)
+    assert manifests[1] is manifests[-1]
+    assert [m.get("Size") for m in manifests] == [7143, 7682]
+    assert isinstance(list.__getitem__(manifests, 0), Descriptor)
+
+    assert index.validate()
+    assert index.to_dict() == expected
+
+
+def test_struct_stream(tmp_path):
+    """test streaming the items of a list attribute from json"""
+    from opencontainers.image.v1 import Index
+    from opencontainers.distribution.v1 import RepositoryList
+    from .test_imageindex import index_with_optional
+    import io
+    import json
+
+    # A small chunk size splits values (and characters) across chunks
+    content = json.dumps(index_with_optional, indent=4).encode("utf-8")
+    expected = [
+        m.to_dict() for m in Index.from_dict(index_with_optional).get("Manifests")
+    ]
+    for stream in [io.BytesIO(content), io.StringIO(content.decode("utf-8"))]:
+        manifests = Index.iter_from_stream(stream, "Manifests", chunk_size=7)
+        assert [m.to_dict() for m in manifests] == expected
+
+    chunks = [b'{"repositories": ["caf\xc3', b'\xa9", "b', b'ar"]}']
+    names = list(RepositoryList.iter_from_stream(chunks, "Repositories"))
+    assert names == ["café", "bar"]
+    assert list(RepositoryList.iter_from_stream([b"{}"], "Repositories")) == []
+
+    with pytest.raises(SystemExit):
+        list(RepositoryList.iter_from_stream([b'{"repositories": [1'], "Repositories"))
+    with pytest.raises(SystemExit):
+        list(Index.iter_from_stream([b'{"manifests": [{"size": "7"}]}'], "Manifests"))
+
+
+def test_struct_intern(tmp_path):
+    """test that repeated values are shared across loaded structs"""
+    from opencontainers.image.v1 import Manifest
+    from opencontainers.digest import Digest
+    from opencontainers.intern import InternTable
+    from .test_manifest import valid_with_optional
+    import json
+
+    encoded = json.dumps(valid_with_optional)
+    first = Manifest.from_dict(json.loads(encoded))
+    second = Manifest.from_dict(json.loads(encoded), trust=True)
+    for name in ["MediaType", "Digest"]:
+        assert first.get("Config").get(name) is second.get("Config").get(name)
+    keys = [list(m.get("Annotations"))[0] for m in [first, second]]
+    assert keys[0] is keys[1]
+
+    # Weak tables drop values no longer used, and can be bounded
+    table = InternTable(maxsize=1)
+    digest = table.intern(Digest("sha256:" + "a" * 64))
+    assert table.intern(Digest("sha256:" + "a" * 64)) is digest
+    other = Digest("sha256:" + "b" * 64)
+    assert table.intern(other) is other and len(table) == 1
+    del digest
+    assert len(table) == 0
+
+
+def test_struct_pickle(tmp_path):
+    """test that structs round trip through pickle without the cache"""
+    from opencontainers.image.v1 import Index, Manifest
+    from opencontainers.digest import Digest
+    from .test_imageindex import index_with_optional
+    from .test_manifest import valid_with_optional
+    import pickle
+
+    manifest = Manifest.from_dict(valid_with_optional)
+    expected = manifest.to_dict()
+    restored = pickle.loads(pickle.dumps(manifest, protocol=5))
+    assert "_cache" not in restored.__dict__
+    assert restored.to_dict() == expected
+    assert isinstance(restored.get("Config").get("Digest"), Digest)
+
+    # Lazy lists stay lazy
+    index = Index.from_dict(index_with_optional, lazy=True)
+    restored = pickle.loads(pickle.dumps(index, protocol=5))
+    assert isinstance(list.__getitem__(restored.get("Manifests"), 0), dict)
+    assert restored.to_dict() == Index.from_dict(index_with_optional).to_dict()
+
+    # Attributes added to an instance are kept
+    manifest.newAttr(name="Extra", attType=str, jsonName="extra")
+    manifest.add("Extra", "value")
+    restored = pickle.loads(pickle.dumps(manifest))
+    assert restored.to_dict()["extra"] == "value"
+    assert "Extra" not in Manifest._fields
+
+
+def test_struct_with_changes(tmp_path):
+    """test deriving a struct that shares the values that didn't change"""
+    from opencontainers.image.v1 import Manifest
+    from .test_manifest import valid_with_optional
+
+    manifest = Manifest.from_dict(valid_with_optional)
+    expected = copy.deepcopy(manifest.to_dict())
+    layers = manifest.get("Layers")
+
+    derived = manifest.with_changes(Annotations={"key": "value"}, Layers=layers[:1])
+    assert derived.to_dict()["annotations"] == {"key": "value"}
+    assert derived.get("Layers")[0] is layers[0]
+    assert derived.get("Config") is manifest.get("Config")
+    assert manifest.to_dict() == expected
+
+    # Dictionaries are loaded, and None unsets a value
+    config = manifest.get("Config").to_dict()
+    derived = derived.with_changes(Config=config, Annotations=None)
+    assert derived.get("Config").to_dict() == config
+    assert derived.get("Config") is not manifest.get("Config")
+    assert "annotations" not in derived.to_dict()
+
+    # A change to a shared child clears the cache of both parents
+    derived.get("Layers")[0].add("Size", 1)
+    assert manifest.to_dict()["layers"][0]["size"] == 1
+    assert derived.to_dict()["layers"][0]["size"] == 1
+
+    with pytest.raises(SystemExit):
+        manifest.with_changes(Layers="not a list")
+    with pytest.raises(SystemExit):
+        manifest.with_changes(Unknown=True)
+
+    # Structs that are already loaded are only kept if they are valid
+    from opencontainers.image.v1 import Descriptor, Platform
+
+    with pytest.raises(SystemExit):
+        manifest.with_changes(Config=Descriptor())
+    with pytest.raises(SystemExit):
+        manifest.with_changes(Layers=[layers[0], Descriptor()])
+    descriptor = Descriptor.from_dict(valid_descriptor)
+    with pytest.raises(SystemExit):
+        descriptor.add("Platform", Platform())
+    platform = Platform.from_dict({"architecture": "amd64", "os": "linux"})
+    descriptor.add("Platform", platform.freeze())
+    assert descriptor.to_dict()["platform"] == platform.to_dict()
+
+
+def test_struct_freeze(tmp_path):
+    """test that frozen structs are immutable, hashable and comparable"""
+    from opencontainers.image.v1 import Manifest
+    from .test_manifest import valid_with_optional
+    import hashlib
+    import pickle
+
+    manifest = Manifest.from_dict(valid_with_optional).freeze()
+    other = Manifest.from_dict(valid_with_optional)
+    assert manifest != other
+    other.freeze()
+    assert manifest == other and hash(manifest) == hash(other)
+    assert len({manifest, other}) == 1
+
+    # Layers are deduplicated by content
+    layers = set(manifest.get("Layers")) | set(other.get("Layers"))
+    assert len(layers) == len(set(d["digest"] for d in valid_with_optional["layers"]))
+
+    content = manifest.to_canonical_bytes()
+    assert (
+        manifest.canonical_digest() == "sha256:%s" % hashlib.sha256(content).hexdigest()
+    )
+    assert manifest.canonical_digest() is manifest.canonical_digest()
+
+    # Nothing can be changed in place
+    for change in [
+        lambda: manifest.add("Annotations", {"key": "value"}),
+        lambda: manifest.load(valid_with_optional),
+        lambda: manifest.get("Layers").append(None),
+        lambda: manifest.get("Annotations").update(key="value"),
+        lambda: manifest.get("Config").add("Size", 1),
+    ]:
+        with pytest.raises(SystemExit):
+            change()
+
+    # But a new struct can be derived, sharing the frozen children
+    derived = manifest.with_changes(Annotations={"key": "value"}).freeze()
+    assert derived != manifest
+    assert derived.get("Config") is manifest.get("Config")
+    assert pickle.loads(pickle.dumps(derived)) == derived
+
+
+def test_struct_dispatch(tmp_path):
+    """test that attributes dispatch on their type, including subclasses"""
+
+    class SubDescriptor(Descriptor):
+        pass
+
+    class Wrapper(Struct):
+        schema = [
+            StructAttr("Descriptor", SubDescriptor, jsonName="descriptor"),
+            StructAttr("Descriptors", [SubDescriptor], jsonName="descriptors"),
+            StructAttr("Names", [str], jsonName="names", regexp="^[a-z]+$"),
+        ]
+
+    fields = Wrapper._fields
+    assert fields["Descriptor"]._is_struct()
+    assert fields["Descriptors"]._is_struct(SubDescriptor)
+    assert fields["Names"].is_valid(["abc"])
+    assert not fields["Names"].is_valid(["ABC"])
+    assert not fields["Names"].is_valid("abc")
+
+    content = {
+        "descriptor": valid_descriptor,
+        "descriptors": [valid_descriptor],
+        "names": ["abc"],
+    }
+    wrapper = Wrapper().load(content)
+    assert isinstance(wrapper.get("Descriptor"), SubDescriptor)
+    assert isinstance(wrapper.get("Descriptors")[0], SubDescriptor)
+    assert wrapper.to_dict() == content
+
+
+def test_struct_validate_many(tmp_path):
+    """test that every error of many documents is reported with its path"""
+    from opencontainers.image.v1 import Index
+    from opencontainers.logger import bot, ExitError
+    from .test_manifest import valid_with_optional
+
+    invalid = copy.deepcopy(valid_descriptor)
+    invalid["digest"] = "sha256:5b0bcabd"
+    invalid["size"] = "large"
+    documents = {
+        "valid": {"schemaVersion": 2, "manifests": [valid_descriptor]},
+        "invalid": {"manifests": [valid_descriptor, invalid], "unknown": 1},
+        "json": json.dumps({"schemaVersion": 2, "manifests": [valid_descriptor]}),
+        "broken": "{",
+    }
+    report = Index.validate_many(documents)
+    assert report.count == 4
+    assert report.invalid == ["invalid", "broken"]
+    errors = [(path, message) for name, path, message in report if name == "invalid"]
+    assert sorted(errors) == [
+        ("manifests[1].digest", "invalid checksum digest length"),
+        ("manifests[1].size", "Size (size) is not valid."),
+        ("schemaVersion", "schemaVersion is required."),
+        ("unknown", "unknown is not a valid json attribute."),
+    ]
+
+    # Only documents are decoded, nested structs must be objects
+    from opencontainers.image.v1 import Image
+
+    image = {"architecture": "amd64", "os": "linux"}
+    rootfs = {"type": "layers", "diff_ids": []}
+    nested = Image.validate_many(
+        [
+            dict(image, rootfs=rootfs),
+            dict(image, rootfs=json.dumps(rootfs)),
+            dict(image, rootfs=rootfs, config="x"),
+        ]
+    )
+    assert nested.invalid == [1, 2]
+    assert [(name, path, message) for name, path, message in nested] == [
+        (1, "rootfs", "RootFS must be an object."),
+        (2, "config", "ImageConfig must be an object."),
+    ]
+
+    # Errors of the struct itself are collected too
+    from opencontainers.image.v1 import Manifest
+
+    manifest = copy.deepcopy(valid_with_optional)
+    manifest["layers"][0]["mediaType"] = "application/vnd.oci.image.config.v1+json"
+    manifests = Manifest.validate_many([valid_with_optional, manifest])
+    assert manifests.invalid == [1]
+    assert len(manifests) == 1
+
+    # Reports are the same with a process pool
+    pooled = Index.validate_many(documents, workers=2, chunksize=1)
+    assert pooled.to_dict() == report.to_dict()
+
+    # While collecting, exit raises ExitError and keeps the message
+    with bot.collecting() as messages:
+        with pytest.raises(ExitError):
+            bot.exit("stop")
+    assert messages == ["stop"]
+
+    # Outside of collecting, exit still exits (and load with it)
+    with pytest.raises(SystemExit):
+        bot.exit("stop")
+    with pytest.raises(SystemExit):
+        Index.from_dict(documents["invalid"])
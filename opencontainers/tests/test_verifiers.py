@@ -7,7 +7,12 @@
 # with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from opencontainers.digest import Digest, FromBytes
+from opencontainers.digest.exceptions import (
+    ErrDigestInvalidLength,
+    ErrDigestUnsupported,
+)
 
+import os
 import string
 import io
 import random
@@ -24,6 +29,77 @@ def test_digest_verifier(tmp_path):
     verifier.verified()
 
 
+def test_digest_verifier_chunks(tmp_path):
+    """test that content written in chunks is compared with the digest"""
+    p = os.urandom(100000)
+    digest = FromBytes(p)
+
+    verifier = digest.verifier()
+    view = memoryview(p)
+    for start in range(0, len(p), 4096):
+        verifier.write(view[start : start + 4096])
+    assert verifier.verified()
+    assert verifier.digest == digest
+
+    verifier = digest.verifier()
+    verifier.write(bytearray(p[:10]))
+    assert not verifier.verified()
+    verifier.write(p[10:])
+    assert verifier.verified()
+
+    # Different content is not verified
+    verifier = digest.verifier()
+    verifier.write(p[:-1] + b"x")
+    assert not verifier.verified()
+
+    verifier = FromBytes(b"abc").verifier()
+    verifier.write("abc")
+    assert verifier.verified()
+
+
+def test_digest_verifier_copy(tmp_path):
+    """test that copies of verifiers and digesters keep their state"""
+    from opencontainers.digest import MultiDigester, SHA256
+    import copy
+    import pickle
+
+    verifier = FromBytes(b"hello world").verifier()
+    verifier.write(b"hello ")
+    for copied in [copy.copy(verifier), copy.deepcopy(verifier)]:
+        assert copied.digest == verifier.digest
+        copied.write(b"world")
+        assert copied.verified()
+    assert not verifier.verified()
+
+    # Hash objects can't be pickled
+    with pytest.raises(TypeError):
+        pickle.dumps(verifier)
+
+    digester = SHA256.digester()
+    digester.hash.update(b"content")
+    assert copy.deepcopy(digester).digest() == SHA256.fromBytes(b"content")
+    with MultiDigester(["sha256", "sha512"], threads=True) as multi:
+        multi.write(b"content")
+        with copy.copy(multi) as copied:
+            copied.write(b" and more")
+            assert copied.digests()["sha256"] == SHA256.fromBytes(b"content and more")
+        assert multi.digests()["sha256"] == SHA256.fromBytes(b"content")
+
+    # Other attributes of a struct are copied and pickled with its values
+    from opencontainers.digest.digester import digester as Digester
+
+    named = Digester("sha256")
+    named.newAttr(name="Size", attType=int, jsonName="size")
+    named.add("Size", 5)
+    for copied in [
+        copy.copy(named),
+        copy.deepcopy(named),
+        pickle.loads(pickle.dumps(named)),
+    ]:
+        assert copied.alg == "sha256" and copied.hash is None
+        assert copied.to_dict() == {"size": 5}
+
+
 def test_digest_verifier_unsupported(tmp_path):
     """TestVerifierUnsupportedDigest ensures that unsupported digest validation is
     flowing through verifier creation.
@@ -47,3 +123,77 @@ def test_digest_verifier_unsupported(tmp_path):
     digest = Digest("sha256-garbage:pure")
     verifier = digest.verifier()
     assert not verifier.verified()
+
+
+def test_digest_verifier_file(tmp_path):
+    """test verifying files, read in chunks or memory mapped"""
+    from opencontainers.digest.algorithm import algorithms, mapHash
+
+    p = os.urandom(1024 * 1024 + 17)
+    path = tmp_path / "blob"
+    path.write_bytes(p)
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+
+    for name, alg in algorithms.items():
+        assert alg.fromFile(path, mapped=True) == alg.fromBytes(p)
+        assert alg.fromFile(empty, mapped=True) == alg.fromBytes(b"")
+        hashObj = mapHash(path, alg.hash(), 1000)
+        assert hashObj.hexdigest() == alg.fromBytes(p).encoded()
+
+        for mapped in [True, False]:
+            verifier = alg.fromBytes(p).verifier()
+            verifier.writeFile(path, mapped=mapped)
+            assert verifier.verified()
+            verifier = alg.fromBytes(b"other").verifier()
+            verifier.writeFile(path, mapped=mapped)
+            assert not verifier.verified()
+
+
+def test_digest_verify_many(tmp_path):
+    """test verifying and digesting many files with a pool of threads"""
+    from opencontainers.digest import digest_many, verify_many, SHA512
+    import threading
+
+    paths = []
+    for i in range(20):
+        path = tmp_path / ("blob%s" % i)
+        path.write_bytes(os.urandom(1000 + i))
+        paths.append(str(path))
+    missing = str(tmp_path / "missing")
+
+    digests = list(digest_many(paths + [missing], workers=3))
+    assert [path for path, digest, error in digests] == paths + [missing]
+    assert digests[0][1] == FromBytes(open(paths[0], "rb").read())
+    assert digests[-1][1] is None and "No such file" in digests[-1][2]
+
+    pairs = [(path, digest) for path, digest, error in digests[:-1]]
+    pairs[3] = (paths[3], str(pairs[4][1]))
+    pairs.append((missing, pairs[0][1]))
+    pairs.append((paths[0], "bean:0123456789abcdef"))
+    pairs.append((paths[1], "sha256:abc"))
+
+    calls = []
+    results = list(verify_many(pairs, workers=4, progress=lambda *a: calls.append(a)))
+    errors = {path: error for path, digest, error in results if error}
+    assert [result[0] for result in results] == [path for path, digest in pairs]
+    assert errors[paths[3]] == "digest mismatch"
+    assert "No such file" in errors[missing]
+    assert errors[paths[0]] == str(ErrDigestUnsupported())
+    assert errors[paths[1]] == str(ErrDigestInvalidLength())
+    assert len(errors) == 4
+    assert calls[-1] == (len(pairs), sum(1000 + i for i in range(20)))
+
+    # Results can be given as they complete, and the files can be mapped
+    results = verify_many(pairs[:20], workers=4, ordered=False, mapped=True)
+    assert sorted(path for path, digest, error in results if not error) == sorted(
+        path for path, digest in pairs[:20] if path != paths[3]
+    )
+
+    # Setting cancel stops the results
+    cancel = threading.Event()
+    results = []
+    for result in digest_many(paths, SHA512, workers=2, cancel=cancel):
+        results.append(result)
+        cancel.set()
+    assert len(results) < len(paths)
@@ -0,0 +1,94 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.regexp import RFC3339Regexp
+from datetime import datetime, timezone
+import functools
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class Timestamp(str):
+    """a Timestamp is an RFC 3339 date and time string (e.g., the Created
+    time of an Image or History) that also holds the parsed time, so it can
+    be sorted and compared without parsing it again. It serializes as the
+    original string.
+
+    Ordering (<, <=, >, >=) is by instant, also against a plain RFC 3339
+    string (other strings compare as text), while equality and hashing are
+    by text, as for the string, so a Timestamp equals the string it was
+    parsed from. Two times for the same instant with different offsets are
+    neither equal nor ordered: compare their ns to check for the same instant.
+
+    datetime: the time as a timezone aware datetime (microsecond precision)
+    ns: the time as integer nanoseconds since the epoch (full precision)
+    """
+
+    def __lt__(self, other):
+        other = _ns(other)
+        return NotImplemented if other is None else self.ns < other
+
+    def __gt__(self, other):
+        other = _ns(other)
+        return NotImplemented if other is None else self.ns > other
+
+    def __le__(self, other):
+        other = _ns(other)
+        return NotImplemented if other is None else self.ns <= other
+
+    def __ge__(self, other):
+        other = _ns(other)
+        return NotImplemented if other is None else self.ns >= other
+
+    __hash__ = str.__hash__
+
+    def __reduce__(self):
+        return (parse_timestamp, (str(self),))
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_timestamp(value):
+    """parse an RFC 3339 date and time string (e.g., with nanoseconds like
+    2015-10-31T22:22:56.015925234Z) into a Timestamp, or return None if it
+    isn't one. Results are cached, since the same times are repeated across
+    the history of images that share layers.
+    """
+    match = RFC3339Regexp.match(value)
+    if not match:
+        return None
+    seconds, fraction, offset = match.group("seconds", "fraction", "offset")
+    if offset in "Zz":
+        offset = "+00:00"
+    try:
+        parsed = datetime.fromisoformat(seconds + offset)
+    except ValueError:
+        return None
+
+    # datetime only holds microseconds, so nanoseconds are kept separately
+    nanoseconds = int((fraction or "")[:9].ljust(9, "0"))
+    delta = parsed - EPOCH
+
+    timestamp = Timestamp(value)
+    timestamp.datetime = parsed.replace(microsecond=nanoseconds // 1000)
+    timestamp.ns = (delta.days * 86400 + delta.seconds) * 10**9 + nanoseconds
+    return timestamp
+
+
+def _ns(value):
+    """return the nanoseconds of a Timestamp, or of a string that is one"""
+    if isinstance(value, Timestamp):
+        return value.ns
+    if isinstance(value, str):
+        value = parse_timestamp(value)
+        if value is not None:
+            return value.ns
+
+
+def to_timestamp(value):
+    """return a string as a Timestamp if it is one, otherwise as it is"""
+    if type(value) is str:
+        return parse_timestamp(value) or value
+    return value
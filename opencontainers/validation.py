@@ -0,0 +1,209 @@
+# Copyright (C) 2019-2020 Vanessa Sochat.
+
+# This Source Code Form is subject to the terms of the
+# Mozilla Public License, v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from opencontainers.logger import bot, ExitError
+from opencontainers.struct import Struct, StrStruct, IntStruct
+import json
+
+
+class ValidationReport:
+    """a ValidationReport holds the errors found validating many documents,
+    as a list of (path, message) for each document name. A path is the
+    location of the value in the document (e.g., manifests[0].digest), and
+    is empty for errors of the document itself.
+    """
+
+    def __init__(self):
+        self.errors = {}
+        self.count = 0
+
+    def add(self, name, errors):
+        """add the errors (a list of (path, message)) found for a document"""
+        self.count += 1
+        if errors:
+            self.errors[name] = errors
+
+    @property
+    def valid(self):
+        """True if no errors were found in any document"""
+        return not self.errors
+
+    @property
+    def invalid(self):
+        """the names of the documents with errors"""
+        return list(self.errors)
+
+    def __iter__(self):
+        """yield each error as (name, path, message)"""
+        for name, errors in self.errors.items():
+            for path, message in errors:
+                yield name, path, message
+
+    def __len__(self):
+        return sum(len(errors) for errors in self.errors.values())
+
+    def __str__(self):
+        return "<opencontainers.validation.ValidationReport:%s/%s invalid>" % (
+            len(self.errors),
+            self.count,
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def to_dict(self):
+        return {
+            "documents": self.count,
+            "invalid": len(self.errors),
+            "errors": [
+                {"name": name, "path": path, "message": message}
+                for name, path, message in self
+            ],
+        }
+
+
+def validate_many(structType, documents, workers=None, chunksize=64):
+    """validate many documents against a struct type (e.g., Manifest) and
+    return a ValidationReport with every error found, instead of exiting on
+    the first one as load does.
+
+    Parameters
+    ==========
+    structType: the Struct class to validate the documents against
+    documents: a dictionary of documents by name, or an iterable of them
+               (named by index). A document can be a dictionary, or json
+               text (str or bytes) to decode
+    workers: the number of processes to validate with (default, in process)
+    chunksize: the number of documents sent to a process at once
+    """
+    if isinstance(documents, dict):
+        documents = documents.items()
+    else:
+        documents = enumerate(documents)
+
+    report = ValidationReport()
+    if workers and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        jobs = ((structType, name, content) for name, content in documents)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for name, errors in executor.map(
+                _validate_document, jobs, chunksize=chunksize
+            ):
+                report.add(name, errors)
+        return report
+
+    for name, content in documents:
+        report.add(name, _document_errors(structType, content))
+    return report
+
+
+def _validate_document(job):
+    """validate one (structType, name, content) job in a worker process"""
+    structType, name, content = job
+    return name, _document_errors(structType, content)
+
+
+def _document_errors(structType, content):
+    """return the errors of a document, a dictionary or json text to decode"""
+    if isinstance(content, (str, bytes)):
+        try:
+            content = json.loads(content)
+        except ValueError as e:
+            return [("", "Invalid json: %s" % e)]
+    return collect_errors(structType, content)
+
+
+def collect_errors(structType, content, path=""):
+    """return a list of (path, message) for every error in the content of a
+    struct type, checking the attributes, their types and regular
+    expressions, nested structs and required attributes, as load does.
+    The content is a dictionary (json text is decoded by validate_many), and
+    nested structs must be dictionaries too. The validation of the struct
+    itself (e.g., the media types of the layers of a Manifest) is done when
+    its attributes are valid.
+    """
+    if not isinstance(content, dict):
+        return [(path, "%s must be an object." % structType.__name__)]
+
+    errors = []
+    lookup = structType._json_lookup
+    for key, value in content.items():
+        att = lookup.get(key)
+        if not att:
+            errors.append((_join(path, key), "%s is not a valid json attribute." % key))
+        elif value:
+            errors += _attribute_errors(att, value, _join(path, key))
+
+    for att in structType._fields.values():
+        if att.required and not content.get(att.jsonName):
+            errors.append((_join(path, att.jsonName), "%s is required." % att.name))
+
+    if errors or not hasattr(structType, "_validate"):
+        return errors
+
+    # The attributes are valid, so the struct can be loaded to validate it
+    with bot.collecting() as messages:
+        try:
+            struct = structType.from_dict(content, trust=True)
+            valid = struct._validate()
+        except ExitError:
+            valid = False
+    if not valid:
+        errors += [(path, message) for message in messages] or [
+            (path, "%s is invalid" % structType.__name__)
+        ]
+    return errors
+
+
+def _attribute_errors(att, value, path):
+    """return the errors of a (non empty) value of an attribute"""
+    attType = att.attType
+    if isinstance(attType, list):
+        child = attType[0] if attType else None
+        if not isinstance(value, list):
+            return [(path, "%s must be a list." % att.name)]
+        if isinstance(child, type) and issubclass(child, Struct):
+            errors = []
+            for index, item in enumerate(value):
+                errors += _struct_errors(child, item, "%s[%s]" % (path, index))
+            return errors
+
+    elif isinstance(attType, type) and issubclass(attType, Struct):
+        return _struct_errors(attType, value, path)
+
+    with bot.collecting() as messages:
+        valid = att.is_valid(att.load(value))
+    if valid:
+        return []
+    return [(path, message) for message in messages] or [
+        (path, "%s (%s) is not valid." % (att.name, att.jsonName))
+    ]
+
+
+def _struct_errors(structType, value, path):
+    """return the errors of a nested struct, or string or int struct"""
+    if not issubclass(structType, (StrStruct, IntStruct)):
+        return collect_errors(structType, value, path)
+
+    base = str if issubclass(structType, StrStruct) else int
+    if not isinstance(value, base):
+        return [(path, "%s must be type %s." % (value, structType.__name__))]
+
+    # String structs (e.g., Digest) can raise errors or exit on the first one
+    with bot.collecting() as messages:
+        try:
+            structType(value).validate()
+            return []
+        except ExitError:
+            pass
+        except Exception as e:
+            messages.append(str(e))
+    return [(path, message) for message in messages]
+
+
+def _join(path, key):
+    return "%s.%s" % (path, key) if path else key